@@ -0,0 +1,33 @@
+"""add_extension_lookup_indexes
+
+Revision ID: 8c1f0e2a7b93
+Revises: 404df1d05331
+Create Date: 2025-06-02 10:14:37.218904
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '8c1f0e2a7b93'
+down_revision: Union[str, None] = '404df1d05331'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # CONCURRENTLY can't run inside a transaction block
+    with op.get_context().autocommit_block():
+        op.create_index('ix_extension_shop_account', 'extensions', ['shop_id', 'account_id'],
+                        unique=True, postgresql_concurrently=True)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        op.drop_index('ix_extension_shop_account', table_name='extensions',
+                      postgresql_concurrently=True)
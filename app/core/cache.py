@@ -1,5 +1,6 @@
 # app/core/cache.py
 from redis import Redis
+from redis.asyncio import Redis as AsyncRedis, BlockingConnectionPool
 from app.core.config import settings
 from functools import wraps
 from typing import Optional
@@ -11,6 +12,28 @@ redis_client = Redis.from_url(
     socket_timeout=5
 )
 
+# Non-blocking client for use inside async route handlers. The blocking pool
+# caps connections and makes bursts wait for a free one instead of erroring.
+async_redis_client = AsyncRedis.from_pool(
+    BlockingConnectionPool.from_url(
+        settings.REDIS_URL,
+        max_connections=50,
+        decode_responses=True,
+        socket_timeout=5
+    )
+)
+
+# Same, but returns raw bytes: for large JSON blobs that are parsed (or passed
+# through) as-is, skipping a full-payload str decode on every read.
+async_redis_bytes_client = AsyncRedis.from_pool(
+    BlockingConnectionPool.from_url(
+        settings.REDIS_URL,
+        max_connections=50,
+        decode_responses=False,
+        socket_timeout=5
+    )
+)
+
 
 def cache_key_builder(*args, **kwargs) -> str:
     return f"{args}:{kwargs}"
@@ -11,7 +11,8 @@ celery_app = Celery(
     broker=settings.CELERY_BROKER_URL,
     backend=settings.CELERY_RESULT_BACKEND,
     include=['app.tasks.data_pull_tasks',
-             'app.tasks.ai_tasks']
+             'app.tasks.ai_tasks',
+             'app.tasks.event_tasks']
 )
 
 # Configure Celery
@@ -0,0 +1,42 @@
+# app/core/keys.py
+"""
+Redis key schema. Every key the app reads or writes is built here, so the
+layout stays in one place and writers/readers can't drift apart:
+
+    shopify:{data_type}:{shop}:{task_id}   bulk pull results (JSON)      RESULTS_TTL_SECONDS
+    shopid:{shop_domain}                   shops.id                      SHOP_ID_TTL_SECONDS
+    extshopid:{account_id}                 extensions.shop_id            EXTENSION_SHOP_ID_TTL_SECONDS
+    oauth:state:{state}                    shop domain of an install     OAUTH_STATE_TTL_SECONDS
+    webhook:seen:{webhook_id}              delivery already processed    WEBHOOK_SEEN_TTL_SECONDS
+"""
+
+RESULTS_TTL_SECONDS = 3600
+SHOP_ID_TTL_SECONDS = 86400
+EXTENSION_SHOP_ID_TTL_SECONDS = 300
+OAUTH_STATE_TTL_SECONDS = 600
+WEBHOOK_SEEN_TTL_SECONDS = 86400
+
+_SHOP_ID_PREFIX = "shopid:"
+_EXTENSION_SHOP_ID_PREFIX = "extshopid:"
+_OAUTH_STATE_PREFIX = "oauth:state:"
+_WEBHOOK_SEEN_PREFIX = "webhook:seen:"
+
+
+def shopify_result_key(data_type: str, shop: str, task_id: str) -> str:
+    return ":".join(("shopify", data_type, shop, task_id))
+
+
+def shop_id_key(shop_domain: str) -> str:
+    return _SHOP_ID_PREFIX + shop_domain
+
+
+def extension_shop_id_key(account_id: str) -> str:
+    return _EXTENSION_SHOP_ID_PREFIX + account_id
+
+
+def oauth_state_key(state: str) -> str:
+    return _OAUTH_STATE_PREFIX + state
+
+
+def webhook_seen_key(webhook_id: str) -> str:
+    return _WEBHOOK_SEEN_PREFIX + webhook_id
@@ -1,3 +1,5 @@
+from sqlalchemy import create_engine
+from sqlalchemy.pool import NullPool
 from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession
 from sqlalchemy.orm import sessionmaker
 
@@ -6,8 +8,46 @@ from app.core.config import settings
 # Create an async engine
 # The echo=True argument is useful for debugging, it logs all SQL statements.
 # Set pool_pre_ping=True to enable SQLAlchemy to check connections for liveness before using them.
+# The pool is sized for install/event bursts (the default 5 + 10 overflow starves quickly);
+# pool_recycle drops connections before server-side idle timeouts, and pool_use_lifo keeps
+# the working set on a few warm connections (better prepared-statement cache hit rate).
+# Behind PgBouncer (transaction mode) a second pool here would just pin its server
+# connections, and a statement prepared on one server connection isn't there on the
+# next transaction, so the pool becomes NullPool and both asyncpg caches are off.
+if settings.DATABASE_BEHIND_PGBOUNCER:
+    _engine_options = dict(
+        poolclass=NullPool,
+        connect_args={"statement_cache_size": 0,
+                      "prepared_statement_cache_size": 0},
+    )
+else:
+    _engine_options = dict(
+        pool_size=20,
+        max_overflow=40,
+        pool_pre_ping=True,
+        pool_recycle=1800,
+        pool_use_lifo=True,
+        # Per-connection prepared statement caches (default 100). The hot queries
+        # are module-level statements with bound params, so their SQL text is
+        # stable and repeats skip parse/plan; the headroom keeps them from being
+        # evicted by the long tail of one-off queries.
+        connect_args={"statement_cache_size": 500,
+                      "prepared_statement_cache_size": 500},
+    )
+
 engine = create_async_engine(
-    settings.DATABASE_URL, echo=True, pool_pre_ping=True)
+    settings.DATABASE_URL,
+    echo=True,
+    **_engine_options,
+)
+
+# Celery workers are synchronous, so they write through a plain psycopg2 engine
+# on the same database the API reaches via asyncpg.
+sync_engine = create_engine(
+    settings.DATABASE_URL.replace("+asyncpg", "+psycopg2"),
+    pool_pre_ping=True,
+    **({"poolclass": NullPool} if settings.DATABASE_BEHIND_PGBOUNCER else {}),
+)
 
 # Create a session factory
 # expire_on_commit=False prevents attributes from being expired after commit,
@@ -4,21 +4,27 @@ from app.routers import (
     shopify_webhooks_router,
     data_pull_router,
     ai_router,
-    instant_preview_router
+    instant_preview_router,
+    ingest_app
 )
 from fastapi import FastAPI
+from fastapi.responses import ORJSONResponse
 from fastapi.middleware.cors import CORSMiddleware
 from starlette.middleware.sessions import SessionMiddleware
 
 from contextlib import asynccontextmanager
+import httpx
 
 # Import the setup_logging function
 from app.core.logging_config import setup_logging
 
 # Import settings to ensure .env is loaded early
 from app.core.config import settings
-from app.core.cache import redis_client
+from app.core.cache import redis_client, async_redis_client, async_redis_bytes_client
 from app.core.celery_app import celery_app
+from app.db.session import engine
+from app.services.shopify_service import SHOPIFY_SSL_CONTEXT
+from app.services.event_buffer import start_event_flusher, stop_event_flusher
 
 # Call setup_logging to configure logging as soon as the app starts
 setup_logging()
@@ -29,9 +35,24 @@ async def lifespan(app: FastAPI):
     # Startup
     redis_client.ping()
     celery_app.control.ping()
+    # One pooled HTTP client for outbound Shopify calls so keep-alive connections
+    # (and their TLS sessions) are reused instead of re-handshaking per request.
+    # HTTP/2 multiplexes concurrent calls to the same shop over one connection.
+    app.state.http_client = httpx.AsyncClient(
+        verify=SHOPIFY_SSL_CONTEXT,
+        http2=True,
+        timeout=httpx.Timeout(10.0),
+        limits=httpx.Limits(max_connections=1000,
+                            max_keepalive_connections=100),
+    )
+    # Background writer for batched web pixel event inserts
+    event_flusher = start_event_flusher()
     yield
     # Shutdown
-    # Add any cleanup code here if needed
+    await stop_event_flusher(event_flusher)
+    await app.state.http_client.aclose()
+    await async_redis_client.aclose()
+    await async_redis_bytes_client.aclose()
 
 app = FastAPI(
     title=settings.PROJECT_NAME,
@@ -39,11 +60,14 @@ app = FastAPI(
     version="0.1.0",
     # Define openapi url if using API_V1_STR
     openapi_url=f"{settings.API_V1_STR}/openapi.json",
+    # Serialize JSON responses with orjson instead of the stdlib encoder
+    default_response_class=ORJSONResponse,
     lifespan=lifespan
 )
 
 # Add SessionMiddleware - Make sure SESSION_SECRET_KEY is set in your .env file!
-# This middleware enables session support, which is used by shopify_auth_router for OAuth state.
+# This middleware enables session support. OAuth state itself now lives in Redis
+# (see shopify_auth_router), so no session cookie is set during install.
 app.add_middleware(SessionMiddleware, secret_key=settings.SESSION_SECRET_KEY)
 
 # Set all CORS enabled origins
@@ -96,6 +120,9 @@ app.include_router(data_pull_router.router)
 # Add instant preview router
 app.include_router(instant_preview_router.router)
 
+# Lean Starlette sub-app for web pixel event ingestion (POST /ingest/event)
+app.mount("/ingest", ingest_app.app)
+
 
 @app.get("/health", tags=["Health Check"])
 async def health_check():
@@ -111,3 +138,20 @@ async def debug_env():
         "api_key": settings.SHOPIFY_API_KEY[::] + "...",
         "scopes": settings.SHOPIFY_APP_SCOPES
     }
+
+
+@app.get("/debug-pool")
+async def debug_pool():
+    # Checked-in/out and overflow counts for the DB connection pool
+    return {"pool": engine.pool.status()}
+
+
+if __name__ == "__main__":
+    import uvicorn
+
+    # uvloop + httptools are shipped with uvicorn[standard]; pin them explicitly
+    # so the Shopify I/O paths always run on the libuv-backed event loop.
+    # Keep idle connections open well past uvicorn's 5s default so bursts of
+    # pixel events / webhooks from the same client reuse their connection.
+    uvicorn.run("app.main:app", port=8000, loop="uvloop", http="httptools",
+                timeout_keep_alive=75)
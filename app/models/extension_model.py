@@ -1,10 +1,13 @@
-from sqlalchemy import Column, Integer, String, ForeignKey, DateTime
+from sqlalchemy import Column, Integer, String, ForeignKey, DateTime, Index
 from sqlalchemy.sql import func
 from sqlalchemy.orm import relationship
 from app.db.base import Base
 
 class Extension(Base):
     __tablename__ = "extensions"
+    __table_args__ = (
+        Index("ix_extension_shop_account", "shop_id", "account_id", unique=True),
+    )
 
     id = Column(Integer, primary_key=True, autoincrement=True)
     shop_id = Column(Integer, ForeignKey("shops.id"), nullable=False, index=True)
@@ -0,0 +1,19 @@
+from starlette.applications import Starlette
+from starlette.requests import Request
+from starlette.responses import Response
+from starlette.routing import Route
+
+from app.services.event_ingest import ingest_event
+
+# Bare Starlette app mounted at /ingest for the web pixel fan-in: no FastAPI
+# dependency resolution or response-model coercion, and every reply body is
+# precomputed bytes. Shares ingest_event with POST /api/data/shopify/event,
+# which stays for existing pixels.
+
+
+async def handle_event_fast(request: Request) -> Response:
+    status_code, content = await ingest_event(await request.body())
+    return Response(content, status_code=status_code, media_type="application/json")
+
+
+app = Starlette(routes=[Route("/event", handle_event_fast, methods=["POST"])])
@@ -1,8 +1,8 @@
-from fastapi import APIRouter, HTTPException, Body
+from fastapi import APIRouter, HTTPException, Body, Request
 # Assuming a schema for the URL
 from app.schemas.shopify_schemas import InstantPreviewURLRequest
 from app.services.shopify_preview_service import verify_shopify_url, get_store_public_info
-from app.services.ai_service import AIService
+from app.services.ai_service import ai_service
 import logging
 import json
 from typing import Dict, Any
@@ -14,6 +14,7 @@ router = APIRouter(prefix="/api/instant-preview", tags=["instant-preview"])
 
 @router.post("/analyze-store", response_model=Dict[str, Any])
 async def analyze_store_preview(
+    request: Request,
     store_url_data: InstantPreviewURLRequest = Body(...),
 ):
     """
@@ -28,7 +29,8 @@ async def analyze_store_preview(
     logger.info(f"Received request to analyze store preview for: {store_url}")
 
     # 1. Verify the store URL
-    is_valid = await verify_shopify_url(store_url)
+    http_client = request.app.state.http_client
+    is_valid = await verify_shopify_url(store_url, http_client=http_client)
     if not is_valid:
         logger.warning(
             f"Invalid or unverified Shopify store URL received: {store_url}")
@@ -38,12 +40,12 @@ async def analyze_store_preview(
         )
 
     # 2. Fetch comprehensive public store information
-    store_details = await get_store_public_info(store_url)
+    store_details = await get_store_public_info(store_url, http_client=http_client)
     logger.info(f"Fetched basic store details for {store_url}")
 
     # 3. Use AIService to get insights (Segments and Categories) from Perplexity API
-    ai_service = AIService()  # Instantiate or get singleton instance
-    ai_insights = ai_service.analyze_store_for_preview(store_details)
+    ai_insights = await ai_service.analyze_store_for_preview(
+        store_details, http_client=http_client)
     logger.info(f"Received AI insights for {store_url}")
 
     # 4. Combine results for the response, checking for AI analysis errors
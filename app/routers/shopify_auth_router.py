@@ -2,19 +2,33 @@ import httpx  # Ensure httpx is imported if used for exceptions, though not dire
 import secrets
 import certifi
 from fastapi import APIRouter, Request, HTTPException, Query, Depends, status, Body
-from fastapi.responses import RedirectResponse, JSONResponse, HTMLResponse
+from fastapi.responses import RedirectResponse, HTMLResponse
+from starlette.datastructures import URL
 import logging
 import hmac
 import hashlib
+import re
+from html import escape
+from functools import partial
+from operator import itemgetter
 from typing import Dict, Optional
 from app.services.shopify_service import ShopifyClient
+from app.services.shop_service import get_shop_id, cache_shop_id
+from app.services.extension_service import invalidate_extension
 
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select  # Required for select statement
+from sqlalchemy import select, update, func, bindparam  # Required for select statement
+from sqlalchemy.dialects.postgresql import insert as pg_insert
 
 # from app.services.shopify_service import ShopifyClient # ShopifyClient no longer used in this router
-from app.core.config import settings
-from app.utils.shopify_utils import generate_shopify_auth_url, verify_hmac
+from app.core.config import settings, HTTP_TIMEOUTS, SHOPIFY_API_SECRET_BYTES
+from app.core.cache import async_redis_client
+from app.core.keys import oauth_state_key, OAUTH_STATE_TTL_SECONDS
+from app.utils.shopify_utils import (
+    generate_shopify_auth_url,
+    is_valid_shop_domain,
+    verify_hmac,
+)
 from app.db.session import get_db
 from app.models.shop_model import Shop
 from app.models.extension_model import Extension
@@ -22,11 +36,30 @@ from app.schemas.shopify_schemas import (
     ShopifyActivateExtensionRequest,
     ShopifyActivateExtensionResponse,
 )
-import json
+import orjson
 
 logger = logging.getLogger(__name__)
 router = APIRouter()
 
+# Fast path for reading the accountID out of the webPixel settings JSON string
+_ACCOUNT_ID_RE = re.compile(r'"accountID"\s*:\s*"([^"]+)"')
+
+# Statements built once at import; values are supplied as bind params per request
+_SHOP_BY_DOMAIN = select(Shop).where(Shop.shop_domain == bindparam("shop_domain"))
+# A shop can hold several extension rows (one per account_id); always update
+# the most recently created one so the choice is deterministic.
+_EXTENSION_BY_SHOP_ID = select(
+    Extension.id, Extension.shopify_extension_id
+).where(Extension.shop_id == bindparam("shop_id")).order_by(Extension.id.desc()).limit(1)
+
+# api_key/scopes/redirect_uri are fixed for the app's lifetime; bind them once
+_build_auth_url = partial(
+    generate_shopify_auth_url,
+    api_key=settings.SHOPIFY_API_KEY,
+    scopes=settings.SHOPIFY_APP_SCOPES,
+    redirect_uri=settings.SHOPIFY_REDIRECT_URI,
+)
+
 # Removed temporary in-memory storages as they are replaced by session and DB
 # INSTALL_STATES: Dict[str, str] = {}
 # ACTIVE_INSTALLS: Dict[str, str] = {}
@@ -41,21 +74,18 @@ async def connect_to_shopify(shop: str, request: Request):
     """
     if not shop:
         raise HTTPException(status_code=400, detail="Shop domain is required.")
+    if not is_valid_shop_domain(shop):
+        raise HTTPException(status_code=400, detail="Invalid shop domain.")
 
     state = secrets.token_hex(16)
-    # INSTALL_STATES[state] = shop  # Store state with shop for verification later
-    # For now, we will store the state in the session cookie itself as a temporary measure.
-    # In a real app, you might use a server-side session store or a short-lived DB entry.
-    request.session["shopify_oauth_state"] = state
-    request.session["shopify_oauth_shop"] = shop
-
-    redirect_url = generate_shopify_auth_url(
-        shop_domain=shop,
-        api_key=settings.SHOPIFY_API_KEY,
-        scopes=settings.SHOPIFY_APP_SCOPES,
-        redirect_uri=settings.SHOPIFY_REDIRECT_URI,
-        state=state,
+    # Store state -> shop server-side in Redis with a short TTL. This keeps the
+    # session cookie out of every request and survives embedded-app redirects
+    # that drop SameSite cookies.
+    await async_redis_client.set(
+        oauth_state_key(state), shop, ex=OAUTH_STATE_TTL_SECONDS
     )
+
+    redirect_url = _build_auth_url(shop_domain=shop, state=state)
     return RedirectResponse(redirect_url)
 
 
@@ -76,6 +106,9 @@ async def shopify_callback(
     Verifies HMAC, exchanges the authorization code for an access token,
     and stores the token.
     """
+    if not is_valid_shop_domain(shop):
+        raise HTTPException(status_code=400, detail="Invalid shop domain.")
+
     # 1. Verify HMAC (already have a utility for this, but it needs the raw query string)
     # We need to reconstruct the query string from the request for exact HMAC verification
     # as query parameters might be reordered by FastAPI/Starlette.
@@ -86,17 +119,20 @@ async def shopify_callback(
     # query_params_list = [f"{k}={v}" for k, v in request.query_params.items() if k != 'hmac']
     # verifiable_query_string = "&".join(sorted(query_params_list)) # Ensure consistent order
 
-    # More robust way to get verifiable query string without hmac
-    query_params = dict(request.query_params)
-    # remove hmac and get its value
-    hmac_to_verify = query_params.pop("hmac", None)
+    # Single pass over the params without hmac. multi_items() keeps repeated
+    # params exactly as Shopify signed them (a dict() would silently drop them).
+    hmac_to_verify = request.query_params.get("hmac")
+    items = [(k, v) for k, v in request.query_params.multi_items() if k != "hmac"]
     # The Shopify documentation states the parameters should be sorted alphabetically by key
-    verifiable_query_string = "&".join(
-        [f"{k}={v}" for k, v in sorted(query_params.items())]
-    )
+    items.sort(key=itemgetter(0))
+    verifiable_query_string = "&".join(f"{k}={v}" for k, v in items)
 
+    # verify_hmac compares digests with hmac.compare_digest, so the attacker-controlled
+    # hmac param can't be probed byte-by-byte via response timing.
     if not verify_hmac(
-        verifiable_query_string, hmac_to_verify, settings.SHOPIFY_API_SECRET
+        verifiable_query_string.encode("utf-8"),
+        hmac_to_verify,
+        SHOPIFY_API_SECRET_BYTES,
     ):
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED, detail="HMAC validation failed."
@@ -107,11 +143,10 @@ async def shopify_callback(
     # stored_shop_for_state = request.session.get('shopify_oauth_shop')
     # if not stored_state or stored_state != shop:
     #     raise HTTPException(status_code=403, detail="State validation failed. Possible CSRF attack.")
-    # More robust state verification directly using session
-    session_state = request.session.pop("shopify_oauth_state", None)
-    session_shop = request.session.pop("shopify_oauth_shop", None)
+    # GETDEL atomically consumes the state so a callback URL can't be replayed
+    stored_shop = await async_redis_client.getdel(oauth_state_key(state))
 
-    if not session_state or session_state != state or session_shop != shop:
+    if not stored_shop or not hmac.compare_digest(stored_shop, shop):
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="OAuth state validation failed. Possible CSRF attack or session issue.",
@@ -125,29 +160,32 @@ async def shopify_callback(
         "code": code,
     }
 
-    async with httpx.AsyncClient(verify=False) as client:
-        try:
-            response = await client.post(token_url, json=payload)
-            response.raise_for_status()  # Raises an exception for 4XX/5XX responses
-            token_data = response.json()
-        except httpx.HTTPStatusError as e:
-            # Log the error details from Shopify
-            # logger.error(f"Shopify token exchange failed for {shop}: {e.response.status_code} - {e.response.text}")
-            raise HTTPException(
-                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-                detail=f"Failed to exchange authorization code for access token. Shopify responded with: {e.response.text}",
-            )
-        except httpx.RequestError as e:
-            # logger.error(f"Request error during Shopify token exchange for {shop}: {e}")
-            raise HTTPException(
-                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
-                detail=f"Could not connect to Shopify to exchange token: {str(e)}",
-            )
+    # Shared, pooled client created in the app lifespan (see app/main.py)
+    client = request.app.state.http_client
+    try:
+        response = await client.post(
+            token_url, json=payload, timeout=HTTP_TIMEOUTS["shopify_oauth"]
+        )
+        response.raise_for_status()  # Raises an exception for 4XX/5XX responses
+        token_data = response.json()
+    except httpx.HTTPStatusError as e:
+        # Log the error details from Shopify
+        # logger.error(f"Shopify token exchange failed for {shop}: {e.response.status_code} - {e.response.text}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Failed to exchange authorization code for access token. Shopify responded with: {e.response.text}",
+        )
+    except httpx.RequestError as e:
+        # logger.error(f"Request error during Shopify token exchange for {shop}: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail=f"Could not connect to Shopify to exchange token: {str(e)}",
+        )
 
     access_token = token_data.get("access_token")
     if not access_token:
         logger.error(
-            f"Access token not found in Shopify response for {shop}: {token_data}"
+            "Access token not found in Shopify response for %s: %s", shop, token_data
         )
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -156,7 +194,9 @@ async def shopify_callback(
 
     # --- TEMPORARY LOGGING FOR DEVELOPMENT/TESTING ---
     logger.warning(
-        f"Successfully obtained RAW access token for shop {shop} (FOR TESTING PURPOSES): {access_token}"
+        "Successfully obtained RAW access token for shop %s (FOR TESTING PURPOSES): %s",
+        shop,
+        access_token,
     )
     # --- END TEMPORARY LOGGING ---
 
@@ -165,35 +205,30 @@ async def shopify_callback(
 
     # --- Database Interaction ---
     try:
-        # Check if the shop already exists
-        stmt = select(Shop).where(Shop.shop_domain == shop)
-        result = await db.execute(stmt)
-        db_shop = result.scalar_one_or_none()
-
-        if db_shop:
-            # Shop exists, update the access token
-            db_shop.access_token = access_token
-            # db_shop.is_installed = True # Assuming re-install means it's active
-            # updated_at will be handled by the model if onupdate=func.now() is set
-        else:
-            # Shop does not exist, create a new entry
-            db_shop = Shop(
-                shop_domain=shop,
-                access_token=access_token,
-                # is_installed=True,
-                # shopify_scopes=settings.SHOPIFY_APP_SCOPES # Good to store the scopes granted
+        # Insert the shop or, on reinstall, update its token - one round-trip
+        # and safe under concurrent installs thanks to the unique shop_domain.
+        # updated_at is set explicitly since onupdate doesn't fire for ON CONFLICT.
+        stmt = (
+            pg_insert(Shop)
+            .values(shop_domain=shop, access_token=access_token)
+            .on_conflict_do_update(
+                index_elements=[Shop.shop_domain],
+                set_={"access_token": access_token, "updated_at": func.now()},
             )
-            db.add(db_shop)
+            .returning(Shop.id)
+        )
+        result = await db.execute(stmt)
+        shop_id = result.scalar_one()
 
         await db.commit()
-        await db.refresh(db_shop)
+        await cache_shop_id(shop, shop_id)
         logger.info(
-            f"Successfully processed and stored token for shop: {shop}")
+            "Successfully processed and stored token for shop: %s", shop)
 
     except Exception as e:
         await db.rollback()
         logger.exception(
-            f"Database error during token storage for {shop}: {e}")
+            "Database error during token storage for %s: %s", shop, e)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Failed to save access token to the database: {str(e)}",
@@ -213,12 +248,13 @@ async def shopify_callback(
     # If SHOPIFY_APP_URL is the base URL of your frontend app.
 
     # Redirect to our temporary app home page
-    app_home_url = f"/api/auth/shopify/app-home?shop={shop}"
+    app_home_url = URL("/api/auth/shopify/app-home").include_query_params(shop=shop)
     # For embedded apps, Shopify provides a 'host' param
-    if request.query_params.get("host"):
-        app_home_url += f"&host={request.query_params.get('host')}"
+    host = request.query_params.get("host")
+    if host:
+        app_home_url = app_home_url.include_query_params(host=host)
 
-    return RedirectResponse(app_home_url)
+    return RedirectResponse(str(app_home_url))
 
 
 # Example of how you might retrieve a token later (e.g., for an API call)
@@ -240,28 +276,32 @@ async def shopify_callback(
 
 @router.post("/activate-extension", summary="Activates webpixel extension")
 async def activate_webpixel_extension(
+    request: Request,
     request_data: ShopifyActivateExtensionRequest = Body(...),
     db: AsyncSession = Depends(get_db)
 ):
+    if not is_valid_shop_domain(request_data.shop):
+        raise HTTPException(status_code=400, detail="Invalid shop domain.")
+
     try:
-        # Get shop from database
-        shop_query = select(Shop).where(Shop.shop_domain == request_data.shop)
-        result = await db.execute(shop_query)
-        shop = result.scalar_one_or_none()
+        # Get shop id (Redis-cached, falls back to the database)
+        shop_id = await get_shop_id(request_data.shop, db)
 
-        if not shop:
-            logger.error(f"Shop not found: {request_data.shop}")
+        if shop_id is None:
+            logger.error("Shop not found: %s", request_data.shop)
             raise HTTPException(status_code=404, detail="Shop not found")
 
         # Check if extension already exists
-        extension_query = select(Extension).where(Extension.shop_id == shop.id)
-        result = await db.execute(extension_query)
-        existing_extension = result.scalar_one_or_none()
+        # Only the columns needed to decide create vs. update; no ORM hydration
+        result = await db.execute(_EXTENSION_BY_SHOP_ID, {"shop_id": shop_id})
+        existing_extension = result.first()
 
         if existing_extension:
             # Update existing extension
             client = ShopifyClient(
-                shop=request_data.shop, access_token=request_data.access_token
+                shop=request_data.shop,
+                access_token=request_data.access_token,
+                http_client=request.app.state.http_client,
             )
             raw_response = await client.update_extension(existing_extension.shopify_extension_id)
 
@@ -269,15 +309,18 @@ async def activate_webpixel_extension(
                 data_content = raw_response["data"]["webPixelUpdate"]
                 if len(data_content["userErrors"]) > 0:
                     logger.error(
-                        f"Error updating extension: {data_content['userErrors'][0]['message']}")
+                        "Error updating extension: %s", data_content["userErrors"][0]["message"])
                     raise HTTPException(
                         status_code=500,
                         detail=f"An unexpected error occurred while updating webpixel extension.",
                     )
 
                 # Update extension in database
-                existing_extension.status = 'active'
-                existing_extension.version = '1.0.0'  # Update version as needed
+                await db.execute(
+                    update(Extension)
+                    .where(Extension.id == existing_extension.id)
+                    .values(status='active', version='1.0.0')  # Update version as needed
+                )
                 await db.commit()
 
                 return ShopifyActivateExtensionResponse(
@@ -286,7 +329,9 @@ async def activate_webpixel_extension(
         else:
             # Create new extension
             client = ShopifyClient(
-                shop=request_data.shop, access_token=request_data.access_token
+                shop=request_data.shop,
+                access_token=request_data.access_token,
+                http_client=request.app.state.http_client,
             )
             raw_response = await client.activate_webpixel_extension()
 
@@ -294,32 +339,55 @@ async def activate_webpixel_extension(
                 data_content = raw_response["data"]["webPixelCreate"]
                 if len(data_content["userErrors"]) > 0:
                     logger.error(
-                        f"Error creating extension: {data_content['userErrors'][0]['message']}")
+                        "Error creating extension: %s", data_content["userErrors"][0]["message"])
                     raise HTTPException(
                         status_code=500,
                         detail=f"An unexpected error occurred while activating webpixel extension.",
                     )
 
                 # Create extension in database
-                try:
-                    settings_data = json.loads(
-                        data_content["webPixel"]["settings"])
-                except json.JSONDecodeError as e:
-                    logger.error(f"Failed to parse webPixel settings: {e}")
-                    raise HTTPException(
-                        status_code=500,
-                        detail="Failed to parse webPixel settings from Shopify response"
+                # The settings blob is the flat {"accountID": ...} object we sent, so
+                # pull the id out with a regex and only fall back to a full parse
+                # if Shopify ever returns something shaped differently.
+                raw_settings = data_content["webPixel"]["settings"]
+                match = _ACCOUNT_ID_RE.search(raw_settings)
+                if match:
+                    account_id = match.group(1)
+                else:
+                    try:
+                        account_id = orjson.loads(raw_settings)["accountID"]
+                    except (orjson.JSONDecodeError, KeyError, TypeError) as e:
+                        logger.error("Failed to parse webPixel settings: %s", e)
+                        raise HTTPException(
+                            status_code=500,
+                            detail="Failed to parse webPixel settings from Shopify response"
+                        )
+                # Upsert so a concurrent activation for the same account can't
+                # insert a duplicate row; one round-trip either way.
+                shopify_gid = data_content["webPixel"]["id"]
+                extension_stmt = (
+                    pg_insert(Extension)
+                    .values(
+                        shop_id=shop_id,
+                        shopify_extension_id=shopify_gid,
+                        account_id=account_id,
+                        status='active',
+                        version='1.0.0'
+                    )
+                    .on_conflict_do_update(
+                        index_elements=[Extension.shop_id, Extension.account_id],
+                        set_={
+                            "shopify_extension_id": shopify_gid,
+                            "status": 'active',
+                            "version": '1.0.0',
+                            "updated_at": func.now(),
+                        },
                     )
-                extension = Extension(
-                    shop_id=shop.id,
-                    shopify_extension_id=data_content["webPixel"]["id"],
-                    account_id=settings_data["accountID"],
-                    status='active',
-                    version='1.0.0'
+                    .returning(Extension.id)
                 )
-
-                db.add(extension)
+                await db.execute(extension_stmt)
                 await db.commit()
+                await invalidate_extension(account_id)
 
                 return ShopifyActivateExtensionResponse(
                     success=True, webPixel=data_content["webPixel"]
@@ -327,7 +395,9 @@ async def activate_webpixel_extension(
 
     except Exception as e:
         logger.error(
-            f"Unexpected error in activate extension method for shop {request_data.shop}: {e}",
+            "Unexpected error in activate extension method for shop %s: %s",
+            request_data.shop,
+            e,
             exc_info=True,
         )
         raise HTTPException(
@@ -338,17 +408,21 @@ async def activate_webpixel_extension(
 
 @router.post("/update-extension", summary="Updates webpixel extension")
 async def update_webpixel_extension(
+    request: Request,
     request_data: ShopifyActivateExtensionRequest = Body(...),
 ):
     try:
         client = ShopifyClient(
-            shop=request_data.shop, access_token=request_data.access_token
+            shop=request_data.shop,
+            access_token=request_data.access_token,
+            http_client=request.app.state.http_client,
         )
         raw_response = await client.update_extension(request_data.extension_id)
         if raw_response and "data" in raw_response:
             data_content = raw_response["data"]["webPixelUpdate"]
             if len(data_content["userErrors"]) > 0:
-                print(data_content["userErrors"][0]["message"])
+                logger.error(
+                    "Error updating extension: %s", data_content["userErrors"][0]["message"])
                 raise HTTPException(
                     status_code=500,
                     detail=f"An unexpected error occurred while updating webpixel extension.",
@@ -360,7 +434,9 @@ async def update_webpixel_extension(
 
     except Exception as e:
         logger.error(
-            f"Unexpected error in update extension method for shop {request_data.shop}: {e}",
+            "Unexpected error in update extension method for shop %s: %s",
+            request_data.shop,
+            e,
             exc_info=True,
         )
         raise HTTPException(
@@ -369,57 +445,22 @@ async def update_webpixel_extension(
         )
 
 
-@router.get("/app-home", summary="Temporary App Home Page")
-async def app_home(
-    shop: str,
-    db: AsyncSession = Depends(get_db)
-):
-    """
-    Temporary app home page that displays the shop's connection details.
-    This will be replaced by a proper frontend in the future.
-    """
-    try:
-        # Query the shop details from the database
-        stmt = select(Shop).where(Shop.shop_domain == shop)
-        result = await db.execute(stmt)
-        shop_data = result.scalar_one_or_none()
-
-        if not shop_data:
-            raise HTTPException(
-                status_code=404,
-                detail=f"Shop {shop} not found in database"
-            )
-
-        # Create a response with the shop details
-        response = {
-            "status": "success",
-            "message": "Shopify App Connection Details",
-            "data": {
-                "shop_domain": shop_data.shop_domain,
-                # Note: In production, never expose raw tokens
-                "access_token": shop_data.access_token,
-                "is_installed": shop_data.is_installed,
-                "shopify_scopes": shop_data.shopify_scopes,
-                "created_at": shop_data.created_at.isoformat() if shop_data.created_at else None,
-                "updated_at": shop_data.updated_at.isoformat() if shop_data.updated_at else None
-            }
-        }
-
-        # Return HTML response for better readability
-        html_content = f"""
+# Split once at import into pre-encoded static byte chunks around the ${field}
+# placeholders, so a render is just a bytes join of the escaped values.
+_APP_HOME_HTML = """
         <!DOCTYPE html>
         <html>
         <head>
             <title>Shopify App Home</title>
             <style>
-                body {{ font-family: Arial, sans-serif; margin: 40px; line-height: 1.6; }}
-                .container {{ max-width: 800px; margin: 0 auto; }}
-                .header {{ background: #5c6ac4; color: white; padding: 20px; border-radius: 5px; }}
-                .content {{ background: #f9fafb; padding: 20px; border-radius: 5px; margin-top: 20px; }}
-                .detail {{ margin: 10px 0; }}
-                .label {{ font-weight: bold; color: #4a5568; }}
-                .value {{ color: #2d3748; }}
-                .warning {{ color: #e53e3e; font-style: italic; }}
+                body { font-family: Arial, sans-serif; margin: 40px; line-height: 1.6; }
+                .container { max-width: 800px; margin: 0 auto; }
+                .header { background: #5c6ac4; color: white; padding: 20px; border-radius: 5px; }
+                .content { background: #f9fafb; padding: 20px; border-radius: 5px; margin-top: 20px; }
+                .detail { margin: 10px 0; }
+                .label { font-weight: bold; color: #4a5568; }
+                .value { color: #2d3748; }
+                .warning { color: #e53e3e; font-style: italic; }
             </style>
         </head>
         <body>
@@ -430,27 +471,27 @@ async def app_home(
                 <div class="content">
                     <div class="detail">
                         <span class="label">Shop Domain:</span>
-                        <span class="value">{shop_data.shop_domain}</span>
+                        <span class="value">${shop_domain}</span>
                     </div>
                     <div class="detail">
                         <span class="label">Access Token:</span>
-                        <span class="value">{shop_data.access_token}</span>
+                        <span class="value">${access_token}</span>
                     </div>
                     <div class="detail">
                         <span class="label">Installation Status:</span>
-                        <span class="value">{'Installed' if shop_data.is_installed else 'Not Installed'}</span>
+                        <span class="value">${install_status}</span>
                     </div>
                     <div class="detail">
                         <span class="label">Shopify Scopes:</span>
-                        <span class="value">{', '.join(shop_data.shopify_scopes) if shop_data.shopify_scopes else 'None'}</span>
+                        <span class="value">${scopes}</span>
                     </div>
                     <div class="detail">
                         <span class="label">Created At:</span>
-                        <span class="value">{shop_data.created_at.strftime('%Y-%m-%d %H:%M:%S') if shop_data.created_at else 'N/A'}</span>
+                        <span class="value">${created_at}</span>
                     </div>
                     <div class="detail">
                         <span class="label">Last Updated:</span>
-                        <span class="value">{shop_data.updated_at.strftime('%Y-%m-%d %H:%M:%S') if shop_data.updated_at else 'N/A'}</span>
+                        <span class="value">${updated_at}</span>
                     </div>
                     <p class="warning">Note: This is a temporary page. In production, never expose access tokens in the UI.</p>
                 </div>
@@ -458,12 +499,54 @@ async def app_home(
         </body>
         </html>
         """
+_APP_HOME_PARTS = re.split(r"\$\{(\w+)\}", _APP_HOME_HTML)
+_APP_HOME_CHUNKS = tuple(part.encode("utf-8") for part in _APP_HOME_PARTS[0::2])
+_APP_HOME_FIELDS = tuple(_APP_HOME_PARTS[1::2])
+
+
+def _render_app_home(values: Dict[str, str]) -> bytes:
+    """Stitches the static app-home chunks with the (already escaped) values."""
+    out = [_APP_HOME_CHUNKS[0]]
+    for field, chunk in zip(_APP_HOME_FIELDS, _APP_HOME_CHUNKS[1:]):
+        out.append(values[field].encode("utf-8"))
+        out.append(chunk)
+    return b"".join(out)
+
+
+@router.get("/app-home", summary="Temporary App Home Page")
+async def app_home(
+    shop: str,
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    Temporary app home page that displays the shop's connection details.
+    This will be replaced by a proper frontend in the future.
+    """
+    try:
+        # Query the shop details from the database
+        result = await db.execute(_SHOP_BY_DOMAIN, {"shop_domain": shop})
+        shop_data = result.scalar_one_or_none()
+
+        if not shop_data:
+            raise HTTPException(
+                status_code=404,
+                detail=f"Shop {shop} not found in database"
+            )
+
+        html_content = _render_app_home({
+            "shop_domain": escape(shop_data.shop_domain),
+            "access_token": escape(shop_data.access_token),
+            "install_status": 'Installed' if shop_data.is_installed else 'Not Installed',
+            "scopes": escape(', '.join(shop_data.shopify_scopes)) if shop_data.shopify_scopes else 'None',
+            "created_at": shop_data.created_at.strftime('%Y-%m-%d %H:%M:%S') if shop_data.created_at else 'N/A',
+            "updated_at": shop_data.updated_at.strftime('%Y-%m-%d %H:%M:%S') if shop_data.updated_at else 'N/A',
+        })
 
         return HTMLResponse(content=html_content)
 
     except Exception as e:
         logger.error(
-            f"Error in app home page for shop {shop}: {e}", exc_info=True)
+            "Error in app home page for shop %s: %s", shop, e, exc_info=True)
         raise HTTPException(
             status_code=500,
             detail=f"Error retrieving shop details: {str(e)}"
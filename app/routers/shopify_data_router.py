@@ -1,17 +1,15 @@
-from fastapi import APIRouter, HTTPException, Body, Depends, BackgroundTasks, Path, Query
+from fastapi import APIRouter, HTTPException, Body, Depends, BackgroundTasks, Path, Query, Request
+from fastapi.responses import ORJSONResponse, Response
 import logging
 import httpx
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select
 from app.db.session import get_db
-from app.models.shop_model import Shop
-from app.models.extension_model import Extension
-from app.models.event_model import Event
-from app.core.cache import redis_client
+from app.core.cache import async_redis_bytes_client
+from app.core.keys import shopify_result_key, RESULTS_TTL_SECONDS
 
 from app.services.shopify_service import ShopifyClient
+from app.services.event_ingest import ingest_event
 from app.schemas.shopify_schemas import (
-    GenericResponse,  # For more structured error/success messages
     ShopifyEventRequest,
     ShopifyBulkPullRequest,
 )
@@ -20,62 +18,66 @@ from app.schemas.shopify_schemas import (
 from app.core.config import settings
 from app.tasks.data_pull_tasks import pull_all_data
 from app.tasks.ai_tasks import process_product_task, process_order_history_task, batch_process_products_task
-import json
+import orjson
+import re
 from typing import Dict, Any, List
 
-router = APIRouter()
+# Pinned on the router too, so these payload-heavy endpoints keep orjson
+# encoding even if the router is mounted on an app with a different default.
+# The dict-returning endpoints below use response_model=None and return an
+# ORJSONResponse directly, so cached results (often thousands of records) are
+# not walked by FastAPI's response validation / jsonable_encoder first.
+router = APIRouter(default_response_class=ORJSONResponse)
 logger = logging.getLogger(__name__)
 
 
-@router.post("/event", summary="Handle Shopify Events")
-async def handle_shopify_events(
-    request_data: ShopifyEventRequest = Body(...),
-    db: AsyncSession = Depends(get_db)
-):
-    try:
-        # Get shop from database
-        shop_query = select(Shop).where(
-            Shop.shop_domain == request_data.shop["name"])
-        result = await db.execute(shop_query)
-        shop = result.scalar_one_or_none()
-
-        if not shop:
-            logger.error(f"Shop not found: {request_data.shop['name']}")
-            raise HTTPException(status_code=404, detail="Shop not found")
-
-        # Get extension from database
-        extension_query = select(Extension).where(
-            Extension.account_id == request_data.account_id)
-        result = await db.execute(extension_query)
-        extension = result.scalar_one_or_none()
-
-        if not extension:
-            logger.error(
-                f"Extension not found for account_id: {request_data.account_id}")
-            raise HTTPException(status_code=404, detail="Extension not found")
-
-        # Create event record
-        event = Event(
-            shop_id=shop.id,
-            account_id=request_data.account_id,
-            event_name=request_data.event_name,
-            payload=request_data.payload
-        )
+async def _get_cached_result(redis_key: str):
+    """
+    GET a cached pull result and refresh its TTL (the one the Celery tasks
+    write with) in the same round trip, so results still being polled stay warm.
+    """
+    async with async_redis_bytes_client.pipeline(transaction=False) as pipe:
+        pipe.get(redis_key)
+        pipe.expire(redis_key, RESULTS_TTL_SECONDS)
+        data, _ = await pipe.execute()
+    return data
 
-        # Save to database
-        db.add(event)
-        await db.commit()
 
-        logger.info(
-            f"Event {request_data.event_name} stored for shop {request_data.shop['name']}")
-        return GenericResponse(success=True, message="Event processed successfully")
+# Anything that isn't a plain domain character, and any ".." run, becomes "_"
+_UNSAFE_PATH_CHARS = re.compile(r"[^A-Za-z0-9._-]|\.\.")
+
+
+def _shop_output_dir(shop: str) -> str:
+    """AI output directory for a shop; the domain is sanitised in one pass."""
+    return f"shopify_outputs/{_UNSAFE_PATH_CHARS.sub('_', shop)}"
 
-    except Exception as e:
-        logger.error(f"Error processing event: {str(e)}", exc_info=True)
-        raise HTTPException(status_code=500, detail="Error processing event")
 
+# Envelope pieces for returning cached results without re-parsing them
+_RESULTS_PREFIX = b'{"success":true,"message":'
+_RESULTS_DATA = b',"data":'
 
-@router.post("/bulk-pull", summary="Trigger Full Shopify Data Pull (Customers, Products, Orders)", response_model=Dict[str, Any])
+
+# The body is validated straight from bytes (below), so document it explicitly
+@router.post(
+    "/event",
+    summary="Handle Shopify Events",
+    openapi_extra={
+        "requestBody": {
+            "required": True,
+            "content": {"application/json": {"schema": ShopifyEventRequest.model_json_schema()}},
+        }
+    },
+)
+async def handle_shopify_events(request: Request):
+    # Parse + validate the raw body in one pass in pydantic-core, skipping the
+    # stdlib json.loads FastAPI would otherwise run before validation.
+    # Deployed pixels were built against this route's 200; only /ingest/event
+    # answers 202. The event is buffered, not yet stored, when this returns.
+    status_code, content = await ingest_event(await request.body(), accepted_status=200)
+    return Response(content, status_code=status_code, media_type="application/json")
+
+
+@router.post("/bulk-pull", summary="Trigger Full Shopify Data Pull (Customers, Products, Orders)", response_model=None)
 async def trigger_bulk_pull(
     background_tasks: BackgroundTasks,
     request_data: ShopifyBulkPullRequest = Body(...)
@@ -93,15 +95,15 @@ async def trigger_bulk_pull(
             access_token=request_data.access_token
         )
 
-        return {
+        return ORJSONResponse({
             "success": True,
             "message": "Bulk data pull task scheduled",
             "task_id": task.id,
             "status": "PENDING"
-        }
+        })
 
     except Exception as e:
-        logger.error(f"Error starting data pull: {str(e)}", exc_info=True)
+        logger.error("Error starting data pull: %s", e, exc_info=True)
         raise HTTPException(
             status_code=500,
             detail=f"Error starting data pull: {str(e)}"
@@ -111,19 +113,24 @@ async def trigger_bulk_pull(
 @router.get(
     "/results/{shop}/{task_id}",
     summary="Get Specific Data Type Results for a Data Pull Task",
-    response_model=Dict[str, Any]
+    response_model=None
 )
 async def get_data_pull_results(
     shop: str = Path(..., description="The Shopify store domain (e.g., your-store.myshopify.com)."),
     task_id: str = Path(..., description="The Celery task ID for the specific data type pull (e.g., customer, product, or order subtask ID)."),
     data_type: str = Query(...,
                            description="Type of data to retrieve ('customers', 'products', or 'orders').",
-                           examples=["customers", "products", "orders"])
+                           examples=["customers", "products", "orders"]),
+    validate: bool = Query(False,
+                           description="Parse the cached JSON before returning it, failing with 500 if it is corrupted.")
 ):
     """
     Retrieves the results of a completed data pull operation for a specific data type
     (customers, products, or orders) from the Redis cache.
 
+    By default the cached JSON is spliced into the response as-is, without being
+    parsed and re-serialized; pass validate=true to parse it first.
+
     You must use the task ID of the *specific subtask* for the desired data type
     (e.g., the customer pull task ID), not the ID of the main bulk pull task.
     The subtask IDs are returned in the result/info of the main bulk pull task.
@@ -142,11 +149,11 @@ async def get_data_pull_results(
             )
 
         # Construct Redis key - using the new format including task_id
-        redis_key = f"shopify:{data_type}:{shop}:{task_id}"
-        logger.info(f"Attempting to get data from Redis with key: {redis_key}")
+        redis_key = shopify_result_key(data_type, shop, task_id)
+        logger.info("Attempting to get data from Redis with key: %s", redis_key)
 
         # Get data from Redis
-        data = redis_client.get(redis_key)
+        data = await _get_cached_result(redis_key)
 
         if not data:
             # Check if the task exists and succeeded but data wasn't saved/expired
@@ -156,38 +163,44 @@ async def get_data_pull_results(
                 detail=f"No {data_type} data found for shop {shop} with task ID {task_id}. Results may not be ready, task failed, or data expired."
             )
 
-        # Parse JSON data - Handle both string and bytes data from Redis
+        message = f"Successfully retrieved {data_type} data for task {task_id}"
+        if not validate:
+            # The cache already holds serialized JSON; pass it through untouched
+            return Response(
+                content=b"".join((_RESULTS_PREFIX, orjson.dumps(message),
+                                  _RESULTS_DATA, data, b"}")),
+                media_type="application/json",
+            )
+
+        # Parse JSON data straight from the cached bytes (no str decode copy)
         try:
-            if isinstance(data, bytes):
-            parsed_data = json.loads(data.decode('utf-8'))
-            else:
-                parsed_data = json.loads(data)
-        except json.JSONDecodeError:
+            parsed_data = orjson.loads(data)
+        except orjson.JSONDecodeError:
             logger.error(
-                f"Error parsing cached data for key: {redis_key}", exc_info=True)
+                "Error parsing cached data for key: %s", redis_key, exc_info=True)
             raise HTTPException(
                 status_code=500,
                 detail="Error parsing cached data. Data in cache is corrupted."
             )
         except Exception as e:
             logger.error(
-                f"Unexpected error processing data from Redis for key: {redis_key}: {str(e)}", exc_info=True)
+                "Unexpected error processing data from Redis for key: %s: %s", redis_key, e, exc_info=True)
             raise HTTPException(
                 status_code=500,
                 detail=f"Error processing data from cache: {str(e)}"
             )
 
-        return {
+        return ORJSONResponse({
             "success": True,
-            "message": f"Successfully retrieved {data_type} data for task {task_id}",
+            "message": message,
             "data": parsed_data
-        }
+        })
 
     except HTTPException:
         raise  # Re-raise HTTPExceptions
     except Exception as e:
         logger.error(
-            f"Unexpected error retrieving {data_type} data for shop {shop}, task {task_id}: {str(e)}", exc_info=True)
+            "Unexpected error retrieving %s data for shop %s, task %s: %s", data_type, shop, task_id, e, exc_info=True)
         raise HTTPException(
             status_code=500,
             detail=f"An unexpected error occurred while retrieving {data_type} data: {str(e)}"
@@ -197,7 +210,7 @@ async def get_data_pull_results(
 @router.post(
     "/process-with-ai/{shop}/{task_id}",
     summary="Process Shopify Data with AI",
-    response_model=Dict[str, Any]
+    response_model=None
 )
 async def process_shopify_data_with_ai(
     shop: str = Path(..., description="The Shopify store domain"),
@@ -225,59 +238,149 @@ async def process_shopify_data_with_ai(
             )
 
         # Get data from Redis
-        redis_key = f"shopify:{data_type}:{shop}:{task_id}"
+        redis_key = shopify_result_key(data_type, shop, task_id)
         try:
-            data = redis_client.get(redis_key)
+            data = await _get_cached_result(redis_key)
             if not data:
                 raise HTTPException(
                     status_code=404,
                     detail=f"No {data_type} data found for shop {shop} with task ID {task_id}. Data not found in cache."
                 )
-            # Parse JSON data - Handle both string and bytes data from Redis
-            if isinstance(data, bytes):
-            parsed_data = json.loads(data.decode('utf-8'))
-            else:
-                parsed_data = json.loads(data)
-        except json.JSONDecodeError:
+            # Parse JSON data straight from the cached bytes (no str decode copy)
+            parsed_data = orjson.loads(data)
+        except orjson.JSONDecodeError:
             logger.error(
-                f"Error parsing cached data for key: {redis_key}", exc_info=True)
+                "Error parsing cached data for key: %s", redis_key, exc_info=True)
             raise HTTPException(
                 status_code=500,
                 detail="Error parsing cached data. Data in cache is corrupted."
             )
         except Exception as e:
             logger.error(
-                f"Redis connection error or data retrieval error for key {redis_key}: {str(e)}")
+                "Redis connection error or data retrieval error for key %s: %s", redis_key, e)
             raise HTTPException(
                 status_code=500, detail=f"Error retrieving data from cache: {str(e)}")
 
         # Process based on data type
+        output_dir = _shop_output_dir(shop)
         if data_type == "products":
             if isinstance(parsed_data, list):
                 # Batch process products
                 task = batch_process_products_task.delay(
                     parsed_data,
-                    f"shopify_outputs/{shop.replace('/', '_').replace('..', '_')}/products"
+                    f"{output_dir}/products"
                 )
             else:
                 # Single product
                 task = process_product_task.delay(parsed_data)
         else:  # orders
-            output_dir = f"shopify_outputs/{shop.replace('/', '_').replace('..', '_')}"
             task = process_order_history_task.delay(parsed_data, output_dir)
 
-        return {
+        return ORJSONResponse({
             "success": True,
             "message": f"AI processing task started for {data_type}",
             "task_id": task.id,
             "status": "PENDING"
-        }
+        })
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(
+            "Error processing %s with AI: %s", data_type, e, exc_info=True)
+        raise HTTPException(
+            status_code=500,
+            detail=f"Error processing {data_type} with AI: {str(e)}"
+        )
+
+
+@router.post(
+    "/process-with-ai/{shop}",
+    summary="Process Several Shopify Data Pulls with AI",
+    response_model=None
+)
+async def process_shopify_data_batch_with_ai(
+    shop: str = Path(..., description="The Shopify store domain"),
+    task_ids: List[str] = Query(...,
+                                description="Celery task IDs of the data pulls to combine (repeat the parameter)"),
+    data_type: str = Query(...,
+                           description="Type of data to process ('products' or 'orders')")
+):
+    """
+    Like /process-with-ai/{shop}/{task_id}, but for several pulls at once: all
+    cached results are fetched with one MGET and submitted as a single AI task.
+
+    Args:
+        shop: The Shopify store domain
+        task_ids: The task IDs of the data pulls
+        data_type: The type of data to process ('products' or 'orders')
+    """
+    try:
+        # Validate data type
+        if data_type not in ["products", "orders"]:
+            raise HTTPException(
+                status_code=400,
+                detail="Invalid data type. Must be either 'products' or 'orders'"
+            )
+
+        # Get all datasets (and refresh their TTLs) in one Redis round trip
+        redis_keys = [shopify_result_key(data_type, shop, task_id)
+                      for task_id in task_ids]
+        try:
+            async with async_redis_bytes_client.pipeline(transaction=False) as pipe:
+                pipe.mget(redis_keys)
+                for redis_key in redis_keys:
+                    pipe.expire(redis_key, RESULTS_TTL_SECONDS)
+                cached = (await pipe.execute())[0]
+        except Exception as e:
+            logger.error(
+                "Redis connection error or data retrieval error for keys %s: %s", redis_keys, e)
+            raise HTTPException(
+                status_code=500, detail=f"Error retrieving data from cache: {str(e)}")
+
+        missing = [task_id for task_id, data in zip(task_ids, cached) if not data]
+        if missing:
+            raise HTTPException(
+                status_code=404,
+                detail=f"No {data_type} data found for shop {shop} with task IDs {missing}. Data not found in cache."
+            )
+
+        # Merge the pulls into one list for a single AI task
+        combined = []
+        try:
+            for data in cached:
+                parsed_data = orjson.loads(data)
+                if isinstance(parsed_data, list):
+                    combined.extend(parsed_data)
+                else:
+                    combined.append(parsed_data)
+        except orjson.JSONDecodeError:
+            logger.error(
+                "Error parsing cached data for keys: %s", redis_keys, exc_info=True)
+            raise HTTPException(
+                status_code=500,
+                detail="Error parsing cached data. Data in cache is corrupted."
+            )
+
+        output_dir = _shop_output_dir(shop)
+        if data_type == "products":
+            task = batch_process_products_task.delay(
+                combined, f"{output_dir}/products")
+        else:  # orders
+            task = process_order_history_task.delay(combined, output_dir)
+
+        return ORJSONResponse({
+            "success": True,
+            "message": f"AI processing task started for {data_type} from {len(task_ids)} data pulls",
+            "task_id": task.id,
+            "status": "PENDING"
+        })
 
     except HTTPException:
         raise
     except Exception as e:
         logger.error(
-            f"Error processing {data_type} with AI: {str(e)}", exc_info=True)
+            "Error processing %s with AI: %s", data_type, e, exc_info=True)
         raise HTTPException(
             status_code=500,
             detail=f"Error processing {data_type} with AI: {str(e)}"
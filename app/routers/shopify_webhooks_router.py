@@ -1,10 +1,13 @@
 import logging
-import json
+import orjson
 from fastapi import APIRouter, Request, Header, HTTPException, BackgroundTasks
-from fastapi.responses import JSONResponse
+from fastapi.responses import ORJSONResponse
+from starlette.concurrency import run_in_threadpool
 
-from app.core.config import settings
-from app.utils.webhook_utils import verify_shopify_webhook_hmac
+from app.core.config import SHOPIFY_API_SECRET_BYTES
+from app.core.cache import async_redis_client
+from app.core.keys import webhook_seen_key, WEBHOOK_SEEN_TTL_SECONDS
+from app.utils.webhook_utils import read_verified_webhook_body, WebhookBodyTooLarge
 
 # Import the Celery tasks
 from app.tasks.webhook_tasks import (
@@ -16,13 +19,18 @@ from app.tasks.webhook_tasks import (
 logger = logging.getLogger(__name__)
 router = APIRouter()
 
+# Shopify compliance payloads are a few KB; anything far larger is rejected
+# before it is buffered or hashed.
+MAX_WEBHOOK_BYTES = 2 * 1024 * 1024
+
 
 @router.post("", summary="Receive Shopify Webhooks", status_code=200)
 async def receive_webhook(
     request: Request,
     x_shopify_topic: str = Header(None),
     x_shopify_hmac_sha256: str = Header(None),
-    x_shopify_shop_domain: str = Header(None)
+    x_shopify_shop_domain: str = Header(None),
+    x_shopify_webhook_id: str = Header(None)
 ):
     """
     Receives, authenticates, and dispatches Shopify webhooks.
@@ -31,51 +39,84 @@ async def receive_webhook(
     if not x_shopify_topic or not x_shopify_hmac_sha256 or not x_shopify_shop_domain:
         logger.error("Webhook request missing required Shopify headers.")
         raise HTTPException(status_code=400, detail="Missing Shopify headers")
+    # shops.shop_domain is stored lowercase (installs only accept
+    # ^[a-z0-9-]+.myshopify.com), so normalize here and the tasks' exact
+    # match stays on its unique index.
+    x_shopify_shop_domain = x_shopify_shop_domain.lower()
 
-    raw_body = await request.body()
+    content_length = request.headers.get("content-length")
+    if content_length and content_length.isdigit() and int(content_length) > MAX_WEBHOOK_BYTES:
+        logger.error("Webhook body too large (%s bytes) for shop %s, topic %s.",
+                     content_length, x_shopify_shop_domain, x_shopify_topic)
+        raise HTTPException(status_code=413, detail="Webhook body too large")
 
-    is_hmac_valid = verify_shopify_webhook_hmac(
-        data=raw_body,
-        secret=settings.SHOPIFY_API_SECRET,
-        received_hmac=x_shopify_hmac_sha256
-    )
+    # Hash the body while it streams in rather than buffering it first
+    try:
+        raw_body, is_hmac_valid = await read_verified_webhook_body(
+            request.stream(),
+            secret=SHOPIFY_API_SECRET_BYTES,
+            received_hmac=x_shopify_hmac_sha256,
+            max_bytes=MAX_WEBHOOK_BYTES
+        )
+    except WebhookBodyTooLarge:
+        logger.error("Webhook body too large for shop %s, topic %s.",
+                     x_shopify_shop_domain, x_shopify_topic)
+        raise HTTPException(status_code=413, detail="Webhook body too large")
 
     if not is_hmac_valid:
         logger.error(
-            f"Webhook HMAC validation failed for shop {x_shopify_shop_domain}, topic {x_shopify_topic}.")
+            "Webhook HMAC validation failed for shop %s, topic %s.", x_shopify_shop_domain, x_shopify_topic)
         raise HTTPException(
             status_code=401, detail="HMAC validation failed. Request is not authentic.")
 
+    # Shopify redelivers the same webhook on timeouts; handle each delivery id
+    # once. Checked after HMAC so unauthenticated callers can't pre-claim ids.
+    seen_key = webhook_seen_key(x_shopify_webhook_id) if x_shopify_webhook_id else None
+    if seen_key and not await async_redis_client.set(
+            seen_key, 1, nx=True, ex=WEBHOOK_SEEN_TTL_SECONDS):
+        logger.info("Duplicate webhook %s for shop %s, topic %s; skipping.",
+                    x_shopify_webhook_id, x_shopify_shop_domain, x_shopify_topic)
+        return ORJSONResponse(content={"status": "duplicate"})
+
     try:
-        payload = json.loads(raw_body.decode('utf-8')) if raw_body else {}
-    except json.JSONDecodeError:
+        payload = orjson.loads(raw_body) if raw_body else {}
+    except orjson.JSONDecodeError:
         logger.error(
-            f"Failed to decode JSON payload for shop {x_shopify_shop_domain}, topic {x_shopify_topic}.")
+            "Failed to decode JSON payload for shop %s, topic %s.", x_shopify_shop_domain, x_shopify_topic)
         # Still return 200 as Shopify expects, but log the error.
-        return JSONResponse(
+        return ORJSONResponse(
             content={"status": "error", "message": "Invalid JSON payload"},
             status_code=200  # Shopify expects 200 to not retry, even on payload error
         )
 
     logger.info(
-        f"Received webhook for shop {x_shopify_shop_domain}, topic: {x_shopify_topic}")
-    # logger.debug(f"Webhook payload for {x_shopify_topic}: {payload}") # Log full payload if needed, can be verbose
+        "Received webhook for shop %s, topic: %s", x_shopify_shop_domain, x_shopify_topic)
+    # Full payload only at DEBUG; %-args keep it unformatted unless that level is on
+    logger.debug("Webhook payload for %s: %s", x_shopify_topic, payload)
 
-    # Dispatch to Celery background tasks for compliance topics
-    if x_shopify_topic == "customers/data_request":
-        process_customer_data_request.delay(x_shopify_shop_domain, payload)
-    elif x_shopify_topic == "customers/redact":
-        process_customer_redact.delay(x_shopify_shop_domain, payload)
-    elif x_shopify_topic == "shop/redact":
-        process_shop_redact.delay(x_shopify_shop_domain, payload)
-    # Example for APP_UNINSTALLED if you add it later
-    # elif x_shopify_topic == "app/uninstalled":
-    #     logger.info(f"APP_UNINSTALLED for shop {x_shopify_shop_domain}: {payload}")
-    #     # TODO: Handle app uninstallation, like cleaning up shop data, deactivating services.
-    #     pass
-    else:
-        logger.warning(
-            f"Received unhandled webhook topic: {x_shopify_topic} for shop {x_shopify_shop_domain}")
-        # Still return 200 to acknowledge receipt and prevent Shopify retries
+    # Dispatch to Celery background tasks for compliance topics. .delay() is a
+    # blocking broker publish, so it runs in the threadpool to keep the event
+    # loop free; it is still awaited so a failed publish makes Shopify retry.
+    try:
+        if x_shopify_topic == "customers/data_request":
+            await run_in_threadpool(process_customer_data_request.delay, x_shopify_shop_domain, payload)
+        elif x_shopify_topic == "customers/redact":
+            await run_in_threadpool(process_customer_redact.delay, x_shopify_shop_domain, payload)
+        elif x_shopify_topic == "shop/redact":
+            await run_in_threadpool(process_shop_redact.delay, x_shopify_shop_domain, payload)
+        # Example for APP_UNINSTALLED if you add it later
+        # elif x_shopify_topic == "app/uninstalled":
+        #     logger.info("APP_UNINSTALLED for shop %s", x_shopify_shop_domain)
+        #     # TODO: Handle app uninstallation, like cleaning up shop data, deactivating services.
+        #     pass
+        else:
+            logger.warning(
+                "Received unhandled webhook topic: %s for shop %s", x_shopify_topic, x_shopify_shop_domain)
+            # Still return 200 to acknowledge receipt and prevent Shopify retries
+    except Exception:
+        # Not queued: release the delivery id so Shopify's retry is processed
+        if seen_key:
+            await async_redis_client.delete(seen_key)
+        raise
 
-    return JSONResponse(content={"status": "webhook received"})
+    return ORJSONResponse(content={"status": "webhook received"})
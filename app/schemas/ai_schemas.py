@@ -1,4 +1,4 @@
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, ConfigDict, Field
 from typing import List, Optional, Dict, Any, Union
 
 
@@ -12,6 +12,8 @@ class Option(BaseModel):
 
 
 class ProductAIRequest(BaseModel):
+    model_config = ConfigDict(populate_by_name=True)
+
     title: str
     description: str = Field(alias='body_html')
     handle: str
@@ -20,9 +22,6 @@ class ProductAIRequest(BaseModel):
     options: List[Option]
     images: List[Image]
 
-    class Config:
-        allow_population_by_field_name = True
-
 
 class OrderHistoryAIRequest(BaseModel):
     customer_history: Dict[str, Any]
@@ -3,14 +3,17 @@ import logging
 from app.core.config import settings
 from app.ai.microsegment import MicroSegment
 from app.core.celery_app import celery_app
-import json
+import orjson
 import re
 import os
-import requests
-from requests.exceptions import RequestException, HTTPError
+import contextlib
+import httpx
 
 logger = logging.getLogger(__name__)
 
+# Leading ``` / ```json and trailing ``` around a model's JSON answer
+_FENCE_RE = re.compile(r'^```(?:json)?\s*|\s*```$')
+
 
 class AIService:
     def __init__(self):
@@ -24,13 +27,9 @@ class AIService:
             # Decide how to handle this: could raise an error here or handle it in the analysis method.
             # Handling it in the method allows the application to start even if the key is missing.
 
-        # Initialize an asynchronous HTTP client for making API requests
-        # Using a context manager (async with) in the method is also an option,
-        # but keeping the client here allows potential connection pooling benefits
-        # if the service instance is reused (e.g., via FastAPI Depends).
-        # However, for simplicity and avoiding complex shutdown logic, let's create
-        # the client within the method using a context manager for now.
-        # self._httpx_client = httpx.AsyncClient()
+        # HTTP calls go through the app's shared httpx.AsyncClient (passed in by
+        # the caller), so its pooled connections to the AI API are reused and the
+        # lifespan handler owns shutdown.
 
         logger.info("AIService initialized.")
 
@@ -84,14 +83,20 @@ class AIService:
             )
             return [{"error": f"Failed to batch process products: {str(e)}"}]
 
-    def analyze_store_for_preview(self, store_details: Dict[str, Any]) -> Dict[str, Any]:
+    async def analyze_store_for_preview(
+        self,
+        store_details: Dict[str, Any],
+        http_client: Optional[httpx.AsyncClient] = None,
+    ) -> Dict[str, Any]:
         """
         Analyzes public store information using Perplexity's Sonar API to identify
-        high-value market segments and product categories (using synchronous requests).
+        high-value market segments and product categories.
 
         Args:
             store_details: A dictionary containing public store information
                            fetched by get_store_public_info.
+            http_client: A shared, long-lived httpx.AsyncClient (app.state.http_client).
+                         If omitted, a client is created for this call only.
 
         Returns:
             A dictionary containing lists of high-value segments and product categories
@@ -99,7 +104,7 @@ class AIService:
             Example success: {"high_value_segments": ["...", "..."], "product_categories": ["...", "..."]}
             Example failure: {"ai_error": "...", "ai_status": "failed", ...}
         """
-        logger.info(f"Starting AI analysis for store preview (synchronous).")
+        logger.info("Starting AI analysis for store preview.")
 
         if not self.api_key:
             logger.error(
@@ -183,28 +188,31 @@ class AIService:
         }
 
         try:
-            # 3. Call Perplexity API using requests (synchronous)
-            logger.debug(
-                f"Sending prompt to Perplexity Sonar API via requests")
-
-            # Using requests.post (synchronous)
-            response = requests.post(
-                url, headers=headers, json=payload, timeout=30.0)
+            # 3. Call Perplexity API without blocking the event loop
+            logger.debug("Sending prompt to Perplexity Sonar API")
+
+            client_cm = (contextlib.nullcontext(http_client)
+                         if http_client is not None else httpx.AsyncClient())
+            async with client_cm as client:
+                # Body pre-encoded with orjson; headers already carry Content-Type
+                response = await client.post(
+                    url, headers=headers, content=orjson.dumps(payload), timeout=30.0)
             response.raise_for_status()
 
-            ai_response = response.json()
+            ai_response = orjson.loads(response.content)
 
             # 4. Parse the AI response
             raw_ai_output = ai_response["choices"][0]["message"]["content"].strip(
             )
             logger.debug(f"Received raw AI output:\n{raw_ai_output}")
 
-            # Clean potential markdown code blocks
-            clean_output = re.sub(r'^```json\s*|\s*```$',
-                                  '', raw_ai_output.strip())
-            clean_output = re.sub(r'^```\s*|\s*```$', '', clean_output)
+            # response_format json_schema makes the model return bare JSON, so
+            # stripping markdown code fences is only a defensive fallback
+            clean_output = raw_ai_output
+            if clean_output.startswith('```'):
+                clean_output = _FENCE_RE.sub('', clean_output)
 
-            parsed_response = json.loads(clean_output)
+            parsed_response = orjson.loads(clean_output)
 
             # 5. Add validation for response structure
             if not isinstance(parsed_response.get("high_value_segments"), list) or \
@@ -237,10 +245,10 @@ class AIService:
                 "ai_status": "success"
             }
 
-        # Catch requests exceptions
-        except (HTTPError, RequestException, json.JSONDecodeError, AttributeError, TypeError) as e:
-            # Note: requests.exceptions.RequestException is the base class
-            # requests.exceptions.HTTPError is for 4xx/5xx responses
+        # Catch httpx exceptions
+        except (httpx.HTTPError, orjson.JSONDecodeError, AttributeError, TypeError) as e:
+            # Note: httpx.HTTPError is the base class of both
+            # httpx.RequestError (transport) and httpx.HTTPStatusError (4xx/5xx)
             logger.error(f"AI analysis failed: {e}", exc_info=True)
             return {
                 "high_value_segments": [],
@@ -0,0 +1,152 @@
+import asyncio
+import logging
+from datetime import datetime, timezone
+from typing import List, Optional
+
+from sqlalchemy import insert, select, values, column, String, Integer, DateTime
+from sqlalchemy.dialects.postgresql import JSONB
+from starlette.concurrency import run_in_threadpool
+
+from app.db.session import AsyncSessionLocal
+from app.models.event_model import Event
+from app.models.extension_model import Extension
+from app.tasks.event_tasks import store_event_task
+
+logger = logging.getLogger(__name__)
+
+# Web pixel events are buffered in-process and written with one INSERT per batch,
+# so one commit covers up to EVENT_BATCH_SIZE events instead of one each.
+EVENT_QUEUE_MAXSIZE = 10_000
+EVENT_BATCH_SIZE = 500
+EVENT_FLUSH_INTERVAL_SECONDS = 0.05
+
+_event_queue: "asyncio.Queue[dict]" = asyncio.Queue(maxsize=EVENT_QUEUE_MAXSIZE)
+
+
+class EventQueueFull(Exception):
+    """Raised when the event buffer is full and the event cannot be accepted."""
+
+
+def enqueue_event(row: dict) -> None:
+    """
+    Buffers one event (shop_id, account_id, event_name, payload) for the next
+    batched insert, stamped with its arrival time. shop_id is the extension's
+    shop and is only used if the batch has to be handed to Celery.
+    Raises EventQueueFull if the flusher has fallen behind.
+    """
+    row["received_at"] = datetime.now(timezone.utc)
+    try:
+        _event_queue.put_nowait(row)
+    except asyncio.QueueFull:
+        raise EventQueueFull(
+            f"Event buffer is full ({EVENT_QUEUE_MAXSIZE} pending events)")
+
+
+async def _collect_batch(batch: List[dict]) -> None:
+    """Blocks for the first event, then gathers more until the batch is full or the flush interval elapses."""
+    batch.append(await _event_queue.get())
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + EVENT_FLUSH_INTERVAL_SECONDS
+    while len(batch) < EVENT_BATCH_SIZE:
+        if not _event_queue.empty():
+            batch.append(_event_queue.get_nowait())
+            continue
+        if deadline <= loop.time():
+            break
+        # Not wait_for: on 3.11 it swallows a cancel that lands just as get()
+        # returns, and stop_event_flusher would then wait forever
+        try:
+            async with asyncio.timeout_at(deadline):
+                batch.append(await _event_queue.get())
+        except TimeoutError:
+            break
+
+
+def _insert_batch_stmt(batch: List[dict]):
+    """
+    INSERT ... SELECT over a VALUES list joined to extensions: shop_id is taken
+    from the extension row and events whose extension has since disappeared are
+    skipped, instead of one FK violation failing the whole batch. The join may
+    reorder rows, so each carries its queue position (seq) and the SELECT is
+    ordered by it: event ids follow arrival order.
+    """
+    rows = values(
+        column("seq", Integer),
+        column("account_id", String),
+        column("event_name", String),
+        column("payload", JSONB),
+        column("received_at", DateTime(timezone=True)),
+        name="batch",
+    ).data([
+        (seq, r["account_id"], r["event_name"], r["payload"], r["received_at"])
+        for seq, r in enumerate(batch)
+    ])
+    return insert(Event).from_select(
+        ["shop_id", "account_id", "event_name", "payload", "received_at"],
+        select(Extension.shop_id, rows.c.account_id,
+               rows.c.event_name, rows.c.payload, rows.c.received_at)
+        .join_from(rows, Extension, Extension.account_id == rows.c.account_id)
+        .order_by(rows.c.seq),
+    )
+
+
+def _offload_batch(batch: List[dict]) -> None:
+    """Publishes each event of a batch to the durable Celery path (blocking)."""
+    for r in batch:
+        store_event_task.delay(
+            r["shop_id"], r["account_id"], r["event_name"], r["payload"],
+            r["received_at"].isoformat())
+
+
+async def _write_batch(batch: List[dict]) -> None:
+    """Inserts a batch of events in one statement + commit."""
+    try:
+        async with AsyncSessionLocal() as session:
+            result = await session.execute(_insert_batch_stmt(batch))
+            await session.commit()
+        if result.rowcount != len(batch):
+            logger.warning("Skipped %d of %d events with no matching extension",
+                           len(batch) - result.rowcount, len(batch))
+        logger.debug("Flushed %d events", result.rowcount)
+    except Exception as e:
+        # The events were already acknowledged to the pixel; don't drop them, hand
+        # the batch to Celery (broker publishes are blocking, so off the loop)
+        logger.error("Failed to flush %d events, offloading to Celery: %s",
+                     len(batch), e, exc_info=True)
+        try:
+            await run_in_threadpool(_offload_batch, batch)
+        except Exception as e:
+            logger.critical("Lost %d events: Celery offload failed too: %s",
+                            len(batch), e, exc_info=True)
+
+
+async def _flush_events_loop() -> None:
+    batch: List[dict] = []
+    try:
+        while True:
+            await _collect_batch(batch)
+            await _write_batch(batch)
+            batch = []
+    except asyncio.CancelledError:
+        # Shutdown: persist the partial batch and anything still queued
+        while not _event_queue.empty():
+            batch.append(_event_queue.get_nowait())
+        if batch:
+            await _write_batch(batch)
+        raise
+
+
+def start_event_flusher() -> asyncio.Task:
+    """Starts the background flusher; call once from the app lifespan."""
+    return asyncio.create_task(_flush_events_loop())
+
+
+async def stop_event_flusher(task: Optional[asyncio.Task]) -> None:
+    """Cancels the flusher, letting it write out any buffered events first."""
+    if task is None:
+        return
+    task.cancel()
+    try:
+        await task
+    except asyncio.CancelledError:
+        pass
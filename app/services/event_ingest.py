@@ -0,0 +1,83 @@
+import logging
+from typing import Tuple
+
+import orjson
+from pydantic import ValidationError
+from starlette.concurrency import run_in_threadpool
+
+from app.db.session import AsyncSessionLocal
+from app.schemas.shopify_schemas import ShopifyEventRequest
+from app.services.event_buffer import enqueue_event, EventQueueFull
+from app.services.extension_service import resolve_event_ids
+from app.tasks.event_tasks import store_event_task
+
+logger = logging.getLogger(__name__)
+
+# Reply bodies are precomputed bytes; only a 422 is serialized per request
+_ACCEPTED = b'{"success":true,"message":"Event accepted"}'
+_SHOP_NOT_FOUND = b'{"detail":"Shop not found"}'
+_EXTENSION_NOT_FOUND = b'{"detail":"Extension not found"}'
+_SERVER_ERROR = b'{"detail":"Error processing event"}'
+_UNAVAILABLE = b'{"detail":"Event buffer full, try again later"}'
+
+
+def _validation_error_body(e: ValidationError) -> bytes:
+    """Same shape as FastAPI's 422: {"detail": [...]} with locations starting at "body"."""
+    errors = orjson.loads(e.json(include_url=False))
+    for err in errors:
+        err["loc"] = ["body", *err["loc"]]
+    return orjson.dumps({"detail": errors})
+
+
+async def ingest_event(body: bytes, accepted_status: int = 202) -> Tuple[int, bytes]:
+    """
+    Validates a raw web pixel event body, resolves its shop and extension and
+    hands the row to the batched event writer, falling back to a durable Celery
+    task when the buffer is full.
+
+    Shared by POST /api/data/shopify/event and POST /ingest/event. Returns
+    (status_code, JSON body); accepted_status means the event was accepted.
+    """
+    try:
+        event = ShopifyEventRequest.model_validate_json(body)
+    except ValidationError as e:
+        return 422, _validation_error_body(e)
+
+    shop_domain = event.shop.get("name")
+    try:
+        # One Redis MGET; one combined query on a miss
+        async with AsyncSessionLocal() as db:
+            shop_id, extension_shop_id = await resolve_event_ids(
+                shop_domain, event.account_id, db)
+        if shop_id is None:
+            logger.error("Shop not found: %s", shop_domain)
+            return 404, _SHOP_NOT_FOUND
+        if extension_shop_id is None:
+            logger.error("Extension not found for account_id: %s", event.account_id)
+            return 404, _EXTENSION_NOT_FOUND
+
+        try:
+            enqueue_event({
+                "shop_id": extension_shop_id,
+                "account_id": event.account_id,
+                "event_name": event.event_name,
+                "payload": event.payload,
+            })
+        except EventQueueFull as e:
+            # Buffer saturated: fall back to a durable Celery task. The broker
+            # publish blocks, so it runs in the threadpool.
+            logger.warning("Offloading event %s to Celery: %s", event.event_name, e)
+            try:
+                await run_in_threadpool(
+                    store_event_task.delay,
+                    extension_shop_id, event.account_id, event.event_name, event.payload)
+            except Exception as publish_error:
+                logger.error("Could not offload event %s to Celery: %s",
+                             event.event_name, publish_error, exc_info=True)
+                return 503, _UNAVAILABLE
+    except Exception as e:
+        logger.error("Error processing event: %s", e, exc_info=True)
+        return 500, _SERVER_ERROR
+
+    logger.debug("Event %s queued for shop %s", event.event_name, shop_domain)
+    return accepted_status, _ACCEPTED
@@ -0,0 +1,66 @@
+import logging
+from typing import Optional, Tuple
+
+from sqlalchemy import select, bindparam
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.cache import async_redis_client
+from app.core.keys import (
+    shop_id_key,
+    extension_shop_id_key,
+    SHOP_ID_TTL_SECONDS,
+    EXTENSION_SHOP_ID_TTL_SECONDS,
+)
+from app.models.extension_model import Extension
+from app.models.shop_model import Shop
+
+logger = logging.getLogger(__name__)
+
+# Resolves the shop id and the extension's shop id in a single round trip (two
+# scalar subqueries, each NULL when the row is missing); no rows are hydrated.
+_SHOP_AND_EXTENSION_IDS = select(
+    select(Shop.id)
+    .where(Shop.shop_domain == bindparam("shop_domain"))
+    .scalar_subquery()
+    .label("shop_id"),
+    select(Extension.shop_id)
+    .where(Extension.account_id == bindparam("account_id"))
+    .scalar_subquery()
+    .label("extension_shop_id"),
+)
+
+
+async def resolve_event_ids(
+    shop_domain: str, account_id: str, db: AsyncSession
+) -> Tuple[Optional[int], Optional[int]]:
+    """
+    Returns (shop_id, extension_shop_id) for a web pixel event, either of which
+    is None if the shop / extension is unknown. Both ids are read with a single
+    Redis MGET; on any miss one combined query fills in and re-caches them.
+    """
+    shop_key = shop_id_key(shop_domain)
+    extension_key = extension_shop_id_key(account_id)
+    cached_shop_id, cached_extension_shop_id = await async_redis_client.mget(
+        shop_key, extension_key)
+    if cached_shop_id is not None and cached_extension_shop_id is not None:
+        return int(cached_shop_id), int(cached_extension_shop_id)
+
+    result = await db.execute(_SHOP_AND_EXTENSION_IDS, {
+        "shop_domain": shop_domain,
+        "account_id": account_id,
+    })
+    shop_id, extension_shop_id = result.one()
+
+    async with async_redis_client.pipeline(transaction=False) as pipe:
+        if shop_id is not None:
+            pipe.set(shop_key, shop_id, ex=SHOP_ID_TTL_SECONDS)
+        if extension_shop_id is not None:
+            pipe.set(extension_key, extension_shop_id,
+                     ex=EXTENSION_SHOP_ID_TTL_SECONDS)
+        await pipe.execute()
+    return shop_id, extension_shop_id
+
+
+async def invalidate_extension(account_id: str) -> None:
+    """Drops a cached account_id, e.g. after the extension is (re)registered."""
+    await async_redis_client.delete(extension_shop_id_key(account_id))
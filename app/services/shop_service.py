@@ -0,0 +1,37 @@
+import logging
+from typing import Optional
+
+from sqlalchemy import select, bindparam
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.cache import async_redis_client
+from app.core.keys import shop_id_key, SHOP_ID_TTL_SECONDS
+from app.models.shop_model import Shop
+
+logger = logging.getLogger(__name__)
+
+_SHOP_ID_BY_DOMAIN = select(Shop.id).where(Shop.shop_domain == bindparam("shop_domain"))
+
+
+async def get_shop_id(shop_domain: str, db: AsyncSession) -> Optional[int]:
+    """
+    Returns the shops.id for a shop domain, or None if the shop is unknown.
+    Served from Redis when possible, falling back to the database on a miss.
+    """
+    key = shop_id_key(shop_domain)
+    cached = await async_redis_client.get(key)
+    if cached is not None:
+        return int(cached)
+
+    result = await db.execute(_SHOP_ID_BY_DOMAIN, {"shop_domain": shop_domain})
+    shop_id = result.scalar_one_or_none()
+    if shop_id is not None:
+        await async_redis_client.set(key, shop_id, ex=SHOP_ID_TTL_SECONDS)
+    return shop_id
+
+
+async def cache_shop_id(shop_domain: str, shop_id: int) -> None:
+    """Primes the shop id cache after the shop row is written (e.g. on install)."""
+    await async_redis_client.set(
+        shop_id_key(shop_domain), shop_id, ex=SHOP_ID_TTL_SECONDS
+    )
@@ -1,22 +1,64 @@
+import contextlib
 import httpx
 import re
 import logging
-from typing import Dict, Any
+from typing import Dict, Any, Optional
 from bs4 import BeautifulSoup, Tag
 from urllib.parse import urljoin
 
 logger = logging.getLogger(__name__)
 
+# Matchers for the single tree walk in get_store_public_info. Compiled once;
+# hrefs and class strings are matched with .search() (case-insensitive
+# substring), the meta/rel names by exact value.
+_SOCIAL_PLATFORMS = {
+    'facebook': ['facebook.com', 'fb.com'],
+    'instagram': ['instagram.com'],
+    'twitter': ['twitter.com', 'x.com'],
+    'pinterest': ['pinterest.com'],
+    'youtube': ['youtube.com'],
+    'linkedin': ['linkedin.com'],
+    'tiktok': ['tiktok.com']
+}
+_SOCIAL_HREF_RES = {
+    platform: re.compile('|'.join(map(re.escape, domains)), re.I)
+    for platform, domains in _SOCIAL_PLATFORMS.items()
+}
+_LOGO_CLASS_RE = re.compile(r'logo|brand', re.I)
+_NAV_CLASS_RE = re.compile(r'nav|menu|header', re.I)
+_FOOTER_CLASS_RE = re.compile(r'footer|bottom', re.I)
+_META_NAMES = frozenset(('description', 'keywords', 'robots', 'viewport'))
+_ICON_RELS = frozenset(('icon', 'shortcut icon', 'apple-touch-icon'))
+# "123 Main St, City, ST 12345", optionally with a second locality part
+# ("..., City, County, ST 12345")
+_ADDRESS_RE = re.compile(
+    r'\d+\s+[A-Za-z\s,]+(?:Street|St|Avenue|Ave|Road|Rd|Boulevard|Blvd|Lane|Ln|Drive|Dr|Court|Ct|Circle|Cir|Way|Place|Pl)'
+    r'[,\s]+[A-Za-z\s]+(?:,\s*[A-Za-z\s]+)?,\s*[A-Z]{2}\s*\d{5}')
+# The address search only looks at this much of the visible text, bounding the
+# regex's cost (and its backtracking) on unusually large pages
+_ADDRESS_SEARCH_CHARS = 200_000
 
-async def verify_shopify_url(url: str) -> bool:
+
+def _client(http_client: Optional[httpx.AsyncClient]):
+    """
+    Context manager yielding the shared client if one was passed (left open),
+    otherwise a fresh AsyncClient closed on exit.
+    """
+    if http_client is not None:
+        return contextlib.nullcontext(http_client)
+    return httpx.AsyncClient()
+
+
+async def verify_shopify_url(url: str, http_client: Optional[httpx.AsyncClient] = None) -> bool:
     """
     Verifies if the given URL is a valid and accessible online store URL.
     Attempts to make an HTTP GET request and checks for a successful status code.
+    Pass the app's shared http_client to reuse its pooled connections.
     """
     # Relax the check: simply verify if the URL is accessible
     try:
         # Use a reasonably short timeout for verification
-        async with httpx.AsyncClient() as client:
+        async with _client(http_client) as client:
             response = await client.get(url, follow_redirects=True, timeout=10)
             # Check for successful status codes (2xx)
             if response.status_code >= 200 and response.status_code < 300:
@@ -37,11 +79,12 @@ async def verify_shopify_url(url: str) -> bool:
         return False
 
 
-async def get_store_public_info(url: str) -> Dict[str, Any]:
+async def get_store_public_info(url: str, http_client: Optional[httpx.AsyncClient] = None) -> Dict[str, Any]:
     """
     Fetches comprehensive public information about the store from its homepage.
     Extracts store name, description, social media links, contact info, branding elements,
-    and other relevant metadata.
+    and other relevant metadata. Pass the app's shared http_client to reuse its
+    pooled connections.
     """
     info: Dict[str, Any] = {
         "name": None,
@@ -76,146 +119,139 @@ async def get_store_public_info(url: str) -> Dict[str, Any]:
     }
 
     try:
-        async with httpx.AsyncClient() as client:
+        async with _client(http_client) as client:
             response = await client.get(url, follow_redirects=True, timeout=10)
             response.raise_for_status()
 
-            soup = BeautifulSoup(response.text, 'html.parser')
-
-            # Get store name from title tag
-            if soup.title and soup.title.string:
-                info["name"] = soup.title.string.strip()
-
-            # Get meta description
-            meta_desc = soup.find('meta', attrs={'name': 'description'})
-            if meta_desc and meta_desc.get('content'):
-                info["description"] = meta_desc['content'].strip()
-
-            # Get meta keywords
-            meta_keywords = soup.find('meta', attrs={'name': 'keywords'})
-            if meta_keywords and meta_keywords.get('content'):
-                info["metadata"]["keywords"] = [
-                    k.strip() for k in meta_keywords['content'].split(',')
-                ]
-
-            # Get other meta tags
-            meta_robots = soup.find('meta', attrs={'name': 'robots'})
-            if meta_robots and meta_robots.get('content'):
-                info["metadata"]["robots"] = meta_robots['content']
-
-            meta_viewport = soup.find('meta', attrs={'name': 'viewport'})
-            if meta_viewport and meta_viewport.get('content'):
-                info["metadata"]["viewport"] = meta_viewport['content']
-
-            meta_charset = soup.find('meta', attrs={'charset': True})
-            if meta_charset:
-                info["metadata"]["charset"] = meta_charset['charset']
-
-            # Get favicon URL
-            icon_link = soup.find(
-                'link', rel=['icon', 'shortcut icon', 'apple-touch-icon'])
-
-            if isinstance(icon_link, Tag) and icon_link.get('href'):
-                favicon_url_relative = icon_link.get('href')
-                # Make sure the favicon URL is absolute
-                if favicon_url_relative and not favicon_url_relative.startswith('http'):
-                    # Attempt to construct absolute URL
-                    favicon_url = urljoin(url, favicon_url_relative)
-                else:
-                    favicon_url = favicon_url_relative
-                info["favicon"] = favicon_url
-
-            # Get social media links
-            social_platforms = {
-                'facebook': ['facebook.com', 'fb.com'],
-                'instagram': ['instagram.com'],
-                'twitter': ['twitter.com', 'x.com'],
-                'pinterest': ['pinterest.com'],
-                'youtube': ['youtube.com'],
-                'linkedin': ['linkedin.com'],
-                'tiktok': ['tiktok.com']
-            }
-
-            for platform, domains in social_platforms.items():
-                social_link = soup.find('a', href=lambda x: x and any(
-                    domain in x.lower() for domain in domains))
-                if social_link and social_link.get('href'):
-                    info["social_media"][platform] = social_link['href']
-
-            # Get contact information
-            # Email
-            email_links = soup.find_all(
-                'a', href=lambda x: x and x.startswith('mailto:'))
-            if email_links:
-                info["contact_info"]["email"] = email_links[0]['href'].replace(
-                    'mailto:', '')
-
-            # Phone
-            phone_links = soup.find_all(
-                'a', href=lambda x: x and x.startswith('tel:'))
-            if phone_links:
-                info["contact_info"]["phone"] = phone_links[0]['href'].replace(
-                    'tel:', '')
-
-            # Address (look for common address patterns in text)
-            address_patterns = [
-                r'\d+\s+[A-Za-z\s,]+(?:Street|St|Avenue|Ave|Road|Rd|Boulevard|Blvd|Lane|Ln|Drive|Dr|Court|Ct|Circle|Cir|Way|Place|Pl)[,\s]+[A-Za-z\s]+,\s*[A-Z]{2}\s*\d{5}',
-                r'\d+\s+[A-Za-z\s,]+(?:Street|St|Avenue|Ave|Road|Rd|Boulevard|Blvd|Lane|Ln|Drive|Dr|Court|Ct|Circle|Cir|Way|Place|Pl)[,\s]+[A-Za-z\s]+,\s*[A-Za-z\s]+,\s*[A-Z]{2}\s*\d{5}'
-            ]
-
-            for pattern in address_patterns:
-                address_match = re.search(pattern, response.text)
-                if address_match:
-                    info["contact_info"]["address"] = address_match.group(0)
-                    break
-
-            # Get branding elements
-            # Logo
-            logo_img = soup.find('img', attrs={'class': lambda x: x and any(
-                term in x.lower() for term in ['logo', 'brand'])})
-            if logo_img and logo_img.get('src'):
-                logo_src = logo_img['src']
-                if not logo_src.startswith('http'):
-                    logo_src = urljoin(url, logo_src)
-                info["branding"]["logo"] = logo_src
-
-            # Get main navigation menu items
-            nav_links = soup.find_all('a', attrs={'class': lambda x: x and any(
-                term in x.lower() for term in ['nav', 'menu', 'header'])})
-            for link in nav_links:
-                if link.text.strip():
-                    info["navigation"]["main_menu"].append({
-                        "text": link.text.strip(),
-                        "url": urljoin(url, link.get('href', ''))
-                    })
-
-            # Get footer links
-            footer_links = soup.find_all('a', attrs={'class': lambda x: x and any(
-                term in x.lower() for term in ['footer', 'bottom'])})
-            for link in footer_links:
-                if link.text.strip():
-                    info["navigation"]["footer_links"].append({
-                        "text": link.text.strip(),
-                        "url": urljoin(url, link.get('href', ''))
-                    })
-
-            # Get store features from meta tags and structured data
-            feature_tags = soup.find_all(
-                'meta', attrs={'property': lambda x: x and 'product:' in x})
-            for tag in feature_tags:
-                if tag.get('content'):
-                    info["store_features"].append(tag['content'])
-
-            # Get language and currency from meta tags
-            lang_tag = soup.find('html', attrs={'lang': True})
-            if lang_tag:
-                info["language"] = lang_tag['lang']
-
-            # Look for currency in meta tags or structured data
-            currency_tag = soup.find(
-                'meta', attrs={'property': 'product:price:currency'})
-            if currency_tag and currency_tag.get('content'):
-                info["currency"] = currency_tag['content']
+            # lxml is the C parser backend; handing it the raw bytes skips
+            # building a decoded copy first (bs4 decodes with the header
+            # charset, else the page's <meta charset>)
+            soup = BeautifulSoup(response.content, 'lxml',
+                                 from_encoding=response.charset_encoding)
+
+            # One walk over the tree, dispatching on the tag name, instead of a
+            # separate find/find_all traversal per field. Fields that used to
+            # come from soup.find() still take the first matching element only
+            # ("seen" records which of those have been decided).
+            seen = set()
+            social_pending = dict(_SOCIAL_HREF_RES)
+            for el in soup.descendants:
+                if not isinstance(el, Tag):
+                    continue
+                name = el.name
+
+                if name == 'a':
+                    href = el.get('href')
+                    if href:
+                        # Get social media links
+                        for platform, href_re in list(social_pending.items()):
+                            if href_re.search(href):
+                                info["social_media"][platform] = href
+                                del social_pending[platform]
+                        # Get contact information: email and phone
+                        if 'email' not in seen and href.startswith('mailto:'):
+                            seen.add('email')
+                            info["contact_info"]["email"] = href.replace(
+                                'mailto:', '')
+                        if 'phone' not in seen and href.startswith('tel:'):
+                            seen.add('phone')
+                            info["contact_info"]["phone"] = href.replace(
+                                'tel:', '')
+
+                    # Get main navigation menu items and footer links
+                    classes = el.get('class')
+                    if classes:
+                        class_str = ' '.join(classes)
+                        is_nav = _NAV_CLASS_RE.search(class_str)
+                        is_footer = _FOOTER_CLASS_RE.search(class_str)
+                        text = el.text.strip() if is_nav or is_footer else None
+                        if text:
+                            link = {
+                                "text": text,
+                                "url": urljoin(url, el.get('href', ''))
+                            }
+                            if is_nav:
+                                info["navigation"]["main_menu"].append(link)
+                            if is_footer:
+                                info["navigation"]["footer_links"].append(
+                                    dict(link))
+
+                elif name == 'meta':
+                    content = el.get('content')
+                    meta_name = el.get('name')
+                    if meta_name in _META_NAMES and meta_name not in seen:
+                        seen.add(meta_name)
+                        if content:
+                            if meta_name == 'description':
+                                info["description"] = content.strip()
+                            elif meta_name == 'keywords':
+                                info["metadata"]["keywords"] = [
+                                    k.strip() for k in content.split(',')
+                                ]
+                            else:
+                                # robots / viewport
+                                info["metadata"][meta_name] = content
+
+                    if 'charset' not in seen and el.has_attr('charset'):
+                        seen.add('charset')
+                        info["metadata"]["charset"] = el['charset']
+
+                    # Get store features and currency from product meta tags
+                    prop = el.get('property')
+                    if prop and 'product:' in prop:
+                        if content:
+                            info["store_features"].append(content)
+                        if prop == 'product:price:currency' and 'currency' not in seen:
+                            seen.add('currency')
+                            if content:
+                                info["currency"] = content
+
+                elif name == 'link':
+                    # Get favicon URL
+                    rel = el.get('rel') or []
+                    if 'favicon' not in seen and (
+                            _ICON_RELS.intersection(rel) or ' '.join(rel) in _ICON_RELS):
+                        seen.add('favicon')
+                        favicon_url_relative = el.get('href')
+                        if favicon_url_relative:
+                            # Make sure the favicon URL is absolute
+                            if not favicon_url_relative.startswith('http'):
+                                favicon_url = urljoin(url, favicon_url_relative)
+                            else:
+                                favicon_url = favicon_url_relative
+                            info["favicon"] = favicon_url
+
+                elif name == 'img':
+                    # Get branding elements: logo
+                    classes = el.get('class')
+                    if 'logo' not in seen and classes and \
+                            _LOGO_CLASS_RE.search(' '.join(classes)):
+                        seen.add('logo')
+                        logo_src = el.get('src')
+                        if logo_src:
+                            if not logo_src.startswith('http'):
+                                logo_src = urljoin(url, logo_src)
+                            info["branding"]["logo"] = logo_src
+
+                elif name == 'title':
+                    # Get store name from the (first) title tag
+                    if 'title' not in seen:
+                        seen.add('title')
+                        if el.string:
+                            info["name"] = el.string.strip()
+
+                elif name == 'html':
+                    # Get language from the html tag
+                    if 'lang' not in seen and el.has_attr('lang'):
+                        seen.add('lang')
+                        info["language"] = el['lang']
+
+            # Address (look for common address patterns in the visible text;
+            # get_text skips <script>/<style>, which hold most of a storefront's bytes)
+            address_match = _ADDRESS_RE.search(
+                soup.get_text(' ', strip=True)[:_ADDRESS_SEARCH_CHARS])
+            if address_match:
+                info["contact_info"]["address"] = address_match.group(0)
 
     except httpx.RequestError as e:
         logger.warning(
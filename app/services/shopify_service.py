@@ -1,51 +1,73 @@
+import contextlib
 import httpx
-import hashlib
 import hmac
 import time
+from operator import itemgetter
 from urllib.parse import urlencode, parse_qs
 import ssl
 import certifi
 import json
-from app.core.config import settings
+import orjson
+from app.core.config import settings, SHOPIFY_API_SECRET_BYTES
 import logging
 from app.utils.shopify_utils import generate_id
 import requests
 
 logger = logging.getLogger(__name__)
 
+# Built once and shared by every Shopify client so certificates are actually
+# verified and TLS session tickets can be resumed across calls to the same host.
+SHOPIFY_SSL_CONTEXT = ssl.create_default_context(cafile=certifi.where())
+SHOPIFY_SSL_CONTEXT.set_alpn_protocols(["h2", "http/1.1"])
+
 
 class ShopifyClient:
     """A client for interacting with the Shopify API, handling OAuth and data fetching."""
 
-    def __init__(self, shop: str, access_token: str = None):
+    def __init__(
+        self,
+        shop: str,
+        access_token: str = None,
+        http_client: httpx.AsyncClient = None,
+    ):
         """
         Initializes the ShopifyClient.
 
         Args:
             shop: The shop domain (e.g., your-store.myshopify.com).
             access_token: The Shopify access token for the shop (optional).
+            http_client: A shared, long-lived httpx.AsyncClient to send requests
+                through (optional). When omitted a client is opened per request.
         """
         if not shop:
             raise ValueError("Shop domain cannot be empty.")
         self.shop = shop.strip()
         self.access_token = access_token
+        self.http_client = http_client
         self.api_version = settings.SHOPIFY_API_VERSION
         self.base_url = f"https://{self.shop}/admin/api/{self.api_version}"
         self.graphql_url = f"{self.base_url}/graphql.json"
 
+    def _client(self, **kwargs):
+        """
+        Returns an async context manager yielding an httpx client: the shared
+        pooled client when one was injected (left open on exit), otherwise a
+        short-lived client built with kwargs.
+        """
+        if self.http_client is not None:
+            return contextlib.nullcontext(self.http_client)
+        return httpx.AsyncClient(verify=SHOPIFY_SSL_CONTEXT, **kwargs)
+
     def _validate_hmac(self, params: dict) -> bool:
         """Validates the HMAC signature from Shopify callback."""
         if "hmac" not in params:
             return False
 
         received_hmac = params.pop("hmac")
-        message = urlencode(sorted(params.items()))
+        message = urlencode(sorted(params.items(), key=itemgetter(0)))
 
-        calculated_hmac = hmac.new(
-            settings.SHOPIFY_API_SECRET.encode("utf-8"),
-            message.encode("utf-8"),
-            hashlib.sha256,
-        ).hexdigest()
+        calculated_hmac = hmac.digest(
+            SHOPIFY_API_SECRET_BYTES, message.encode("utf-8"), "sha256").hex()
 
         return hmac.compare_digest(calculated_hmac, received_hmac)
 
@@ -88,10 +110,7 @@ class ShopifyClient:
             "code": code,
         }
 
-        # Create an SSL context that uses certifi's CA bundle
-        # ssl_context = ssl.create_default_context(cafile=certifi.where())
-
-        async with httpx.AsyncClient(verify=False) as client:
+        async with self._client() as client:
             try:
                 response = await client.post(token_url, json=payload)
                 response.raise_for_status()
@@ -135,19 +154,16 @@ class ShopifyClient:
         if variables:
             payload["variables"] = variables
 
-        # Create an SSL context that uses certifi's CA bundle
-        # ssl_context = ssl.create_default_context(cafile=certifi.where())
-
-        async with httpx.AsyncClient(timeout=30.0, verify=False) as client:
+        async with self._client(timeout=30.0) as client:
             try:
                 logger.debug(
                     f"Making GraphQL request to {self.graphql_url} for shop {self.shop} with payload: {payload}"
                 )
                 response = await client.post(
-                    self.graphql_url, headers=headers, json=payload
+                    self.graphql_url, headers=headers, json=payload, timeout=30.0
                 )
                 response.raise_for_status()
-                response_data = response.json()
+                response_data = orjson.loads(response.content)
                 if response_data.get("errors"):
                     logger.error(
                         f"GraphQL errors for shop {self.shop}: {response_data['errors']}"
@@ -453,11 +469,11 @@ class ShopifyClient:
         return await self.make_graphql_request(query)
 
     async def get_bulk_data(self, url: str) -> list:
-        """Download and parse bulk operation results."""
-        async with httpx.AsyncClient(verify=False) as client:
-            response = await client.get(url)
-            response.raise_for_status()
-            return [json.loads(line) for line in response.text.strip().split("\n") if line]
+        """Download and parse bulk operation results, streaming the JSONL body line by line."""
+        async with self._client() as client:
+            async with client.stream("GET", url) as response:
+                response.raise_for_status()
+                return [orjson.loads(line) async for line in response.aiter_lines() if line]
 
 
 def make_sync_graphql_request(shop: str, access_token: str, query: str, variables: dict = None) -> dict:
@@ -488,7 +504,7 @@ def make_sync_graphql_request(shop: str, access_token: str, query: str, variable
                     url,
                     json=payload,
                     headers=headers,
-                    verify=False,
+                    verify=certifi.where(),
                     timeout=30
                 )
 
@@ -670,7 +686,11 @@ def poll_bulk_operation(shop: str, access_token: str) -> dict:
 
 
 def download_bulk_data(url: str) -> list:
-    """Download and parse bulk operation results."""
-    response = requests.get(url)
-    response.raise_for_status()
-    return [json.loads(line) for line in response.text.strip().split("\n") if line]
+    """
+    Download and parse bulk operation results.
+    The JSONL file is streamed and decoded line by line, so the multi-MB body is
+    never held as one string alongside its split copy.
+    """
+    with requests.get(url, stream=True, verify=certifi.where(), timeout=60) as response:
+        response.raise_for_status()
+        return [orjson.loads(line) for line in response.iter_lines() if line]
@@ -1,11 +1,14 @@
 from app.core.celery_app import celery_app
 from app.core.cache import redis_client
+from app.core.keys import shopify_result_key, RESULTS_TTL_SECONDS
 from app.services.shopify_service import ShopifyClient
 from celery import states
 import logging
 from typing import Dict, Any, Optional
+import certifi
 import requests
 import json
+import orjson
 import time
 from celery import shared_task
 from celery.utils.log import get_task_logger
@@ -45,7 +48,7 @@ def make_sync_graphql_request(shop: str, access_token: str, query: str, variable
                     url,
                     json=payload,
                     headers=headers,
-                    verify=False,
+                    verify=certifi.where(),
                     timeout=30
                 )
 
@@ -133,11 +136,11 @@ def pull_customers(self, shop: str, access_token: str) -> Dict[str, Any]:
         op = poll_bulk_operation(shop, access_token)
         if op["status"] == "COMPLETED":
             data = download_bulk_data(op["url"])
-            redis_key = f"shopify:customers:{shop}:{self.request.id}"
+            redis_key = shopify_result_key("customers", shop, self.request.id)
             redis_client.set(
                 redis_key,
                 json.dumps(data),
-                ex=3600
+                ex=RESULTS_TTL_SECONDS
             )
             return {
                 'success': True,
@@ -188,11 +191,11 @@ def pull_products(self, shop: str, access_token: str) -> Dict[str, Any]:
         op = poll_bulk_operation(shop, access_token)
         if op["status"] == "COMPLETED":
             data = download_bulk_data(op["url"])
-            redis_key = f"shopify:products:{shop}:{self.request.id}"
+            redis_key = shopify_result_key("products", shop, self.request.id)
             redis_client.set(
                 redis_key,
                 json.dumps(data),
-                ex=3600
+                ex=RESULTS_TTL_SECONDS
             )
             return {
                 'success': True,
@@ -244,11 +247,11 @@ def pull_orders(self, shop: str, access_token: str) -> Dict[str, Any]:
         op = poll_bulk_operation(shop, access_token)
         if op["status"] == "COMPLETED":
             data = download_bulk_data(op["url"])
-            redis_key = f"shopify:orders:{shop}:{self.request.id}"
+            redis_key = shopify_result_key("orders", shop, self.request.id)
             redis_client.set(
                 redis_key,
                 json.dumps(data),
-                ex=3600
+                ex=RESULTS_TTL_SECONDS
             )
             return {
                 'success': True,
@@ -422,10 +425,14 @@ def poll_bulk_operation(shop: str, access_token: str) -> dict:
 
 
 def download_bulk_data(url: str) -> list:
-    """Download and parse bulk operation results."""
-    response = requests.get(url)
-    response.raise_for_status()
-    return [json.loads(line) for line in response.text.strip().split("\n") if line]
+    """
+    Download and parse bulk operation results.
+    The JSONL file is streamed and decoded line by line, so the multi-MB body is
+    never held as one string alongside its split copy.
+    """
+    with requests.get(url, stream=True, verify=certifi.where(), timeout=60) as response:
+        response.raise_for_status()
+        return [orjson.loads(line) for line in response.iter_lines() if line]
 
 
 @shared_task(bind=True, name="pull_all_data")
@@ -0,0 +1,42 @@
+# app/tasks/event_tasks.py
+from app.core.celery_app import celery_app
+from app.db.session import sync_engine
+from app.models.event_model import Event
+from sqlalchemy import insert
+from datetime import datetime
+from typing import Optional
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+@celery_app.task(
+    bind=True,
+    name="store_event_task",
+    acks_late=True,
+    reject_on_worker_lost=True,
+    max_retries=3,
+)
+def store_event_task(self, shop_id: int, account_id: str, event_name: str, payload: dict,
+                     received_at: Optional[str] = None):
+    """
+    Durable fallback for web pixel events: used when the API's in-process event
+    buffer is full or a batch fails to flush, so events are persisted by a worker
+    instead of rejected or lost. received_at (ISO 8601) keeps the API's arrival
+    time. The message is only acked once the row is committed.
+    """
+    row = dict(
+        shop_id=shop_id,
+        account_id=account_id,
+        event_name=event_name,
+        payload=payload,
+    )
+    if received_at is not None:
+        row["received_at"] = datetime.fromisoformat(received_at)
+    try:
+        with sync_engine.begin() as conn:
+            conn.execute(insert(Event).values(**row))
+    except Exception as e:
+        logger.error("Error storing event %s for account %s: %s",
+                     event_name, account_id, e, exc_info=True)
+        raise self.retry(exc=e, countdown=5)
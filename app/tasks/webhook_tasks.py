@@ -78,7 +78,7 @@ def process_customer_data_request(self, shop_domain: str, payload: dict):
                           'status': 'Customer data request processed'})
 
     except Exception as exc:
-        logger.error(f"Error processing customer data request: {exc}")
+        logger.error("Error processing customer data request: %s", exc)
         self.update_state(state=states.FAILURE, meta={
                           'status': 'Failed', 'error': str(exc)})
         self.retry(exc=exc, countdown=60)
@@ -141,7 +141,7 @@ def process_customer_redact(self, shop_domain: str, payload: dict):
                           'status': 'Customer data redacted'})
 
     except Exception as exc:
-        logger.error(f"Error processing customer redact request: {exc}")
+        logger.error("Error processing customer redact request: %s", exc)
         self.update_state(state=states.FAILURE, meta={
                           'status': 'Failed', 'error': str(exc)})
         self.retry(exc=exc, countdown=60)
@@ -161,7 +161,7 @@ def process_shop_redact(self, shop_domain: str, payload: dict):
                           'status': 'Shop data redacted'})
 
     except Exception as exc:
-        logger.error(f"Error processing shop redact request: {exc}")
+        logger.error("Error processing shop redact request: %s", exc)
         self.update_state(state=states.FAILURE, meta={
                           'status': 'Failed', 'error': str(exc)})
         self.retry(exc=exc, countdown=60)
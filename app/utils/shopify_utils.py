@@ -1,11 +1,23 @@
 import hmac
-import hashlib
 import base64
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Union
 from urllib.parse import urlencode
+import re
 import secrets
 import string
 
+# Shopify shop domains are always <handle>.myshopify.com. Used with fullmatch:
+# with match, "$" would also accept a trailing "\n".
+_SHOP_DOMAIN_RE = re.compile(r"[a-z0-9][a-z0-9-]*\.myshopify\.com")
+
+
+def is_valid_shop_domain(shop: str) -> bool:
+    """
+    Checks that the shop parameter is a bare *.myshopify.com domain.
+    Used to reject forged shop values before redirecting to or calling out to them.
+    """
+    return bool(shop) and _SHOP_DOMAIN_RE.fullmatch(shop) is not None
+
 
 def generate_shopify_auth_url(
     shop_domain: str,
@@ -32,22 +44,26 @@ def generate_shopify_auth_url(
 
 
 def verify_hmac(
-    query_params_string: str, received_hmac: str, api_secret_key: str
+    query_params_string: Union[str, bytes], received_hmac: str, api_secret_key: Union[str, bytes]
 ) -> bool:
     """
     Verifies the HMAC signature from Shopify.
     Note: query_params_string should be the raw query string (e.g., from request.scope['query_string'])
     with the 'hmac' parameter REMOVED, and other parameters sorted alphabetically.
-    The shopify_auth_router.py already prepares this string.
+    The shopify_auth_router.py already prepares this string. It may be passed
+    pre-encoded as bytes to skip re-encoding here; the same goes for api_secret_key.
+    The comparison is constant-time (hmac.compare_digest).
     """
     if not query_params_string or not received_hmac or not api_secret_key:
         return False
 
-    calculated_hmac = hmac.new(
-        api_secret_key.encode("utf-8"),
-        query_params_string.encode("utf-8"),
-        hashlib.sha256,
-    ).hexdigest()
+    if isinstance(query_params_string, str):
+        query_params_string = query_params_string.encode("utf-8")
+    if isinstance(api_secret_key, str):
+        api_secret_key = api_secret_key.encode("utf-8")
+
+    calculated_hmac = hmac.digest(
+        api_secret_key, query_params_string, "sha256").hex()
 
     # logger.debug(f"Received HMAC: {received_hmac}")
     # logger.debug(f"Calculated HMAC: {calculated_hmac}")
@@ -2,37 +2,48 @@ import hashlib
 import hmac
 import base64
 import logging
+from typing import AsyncIterator, Optional, Tuple
 
 logger = logging.getLogger(__name__)
 
 
-def verify_shopify_webhook_hmac(data: bytes, secret: str, received_hmac: str) -> bool:
+class WebhookBodyTooLarge(Exception):
+    """Raised when a webhook body exceeds the allowed size while being read."""
+
+
+async def read_verified_webhook_body(
+    body_stream: AsyncIterator[bytes], secret: bytes, received_hmac: str,
+    max_bytes: Optional[int] = None
+) -> Tuple[bytearray, bool]:
     """
-    Verifies the HMAC signature of an incoming Shopify webhook request.
+    Reads a webhook body from the request stream, feeding each chunk into the
+    HMAC as it arrives so the payload is only held once (no separate hashing
+    pass over a fully buffered body).
 
     Args:
-        data: The raw request body (bytes).
-        secret: The Shopify App's API secret key.
+        body_stream: The request body stream, e.g. request.stream().
+        secret: The Shopify App's API secret key, already encoded.
         received_hmac: The HMAC signature from the X-Shopify-Hmac-SHA256 header.
+        max_bytes: If set, stop reading and raise WebhookBodyTooLarge once the
+            body grows past this many bytes (covers chunked uploads that carry
+            no Content-Length).
 
     Returns:
-        True if the HMAC is valid, False otherwise.
+        A (body, is_valid) tuple; body is a bytearray that orjson can parse directly.
     """
-    if not data or not secret or not received_hmac:
+    mac = hmac.new(secret, digestmod=hashlib.sha256)
+    body = bytearray()
+    async for chunk in body_stream:
+        body += chunk
+        if max_bytes is not None and len(body) > max_bytes:
+            raise WebhookBodyTooLarge(
+                f"Webhook body exceeds {max_bytes} bytes")
+        mac.update(chunk)
+
+    if not body or not secret or not received_hmac:
         logger.warning(
             "HMAC verification attempted with missing data, secret, or received_hmac.")
-        return False
-
-    try:
-        calculated_hmac_bytes = hmac.new(secret.encode(
-            'utf-8'), data, hashlib.sha256).digest()
-        calculated_hmac_b64 = base64.b64encode(
-            calculated_hmac_bytes).decode('utf-8')
-
-        logger.debug(
-            f"Calculated HMAC: {calculated_hmac_b64}, Received HMAC: {received_hmac}")
-        return hmac.compare_digest(calculated_hmac_b64, received_hmac)
-    except Exception as e:
-        logger.error(
-            f"Error during HMAC calculation or comparison: {e}", exc_info=True)
-        return False
+        return body, False
+
+    return body, hmac.compare_digest(
+        base64.b64encode(mac.digest()), received_hmac.encode('utf-8'))
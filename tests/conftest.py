@@ -0,0 +1,6 @@
+import os
+
+# app.core.config requires these; unit tests never reach Shopify with them
+for name in ("SHOPIFY_API_KEY", "SHOPIFY_API_SECRET", "SHOPIFY_APP_URL",
+             "SHOPIFY_REDIRECT_URI", "APP_SECRET_KEY", "SESSION_SECRET_KEY"):
+    os.environ.setdefault(name, "test")
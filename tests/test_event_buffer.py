@@ -0,0 +1,221 @@
+"""
+Batched web pixel event writer (app/services/event_buffer.py), exercised with
+a fake session and Celery task so no database or broker is needed.
+"""
+import asyncio
+import logging
+from datetime import datetime, timezone
+from types import SimpleNamespace
+
+import pytest
+from sqlalchemy.dialects import postgresql
+
+from app.services import event_buffer
+
+
+def _row(n, account_id="acct-1"):
+    return {
+        "shop_id": 1,
+        "account_id": account_id,
+        "event_name": f"event-{n}",
+        "payload": {"n": n},
+        "received_at": datetime(2025, 6, 1, 12, 0, n, tzinfo=timezone.utc),
+    }
+
+
+class FakeSession:
+    """Stands in for AsyncSessionLocal(): records statements and commits."""
+
+    def __init__(self, rowcount=0, error=None):
+        self.rowcount = rowcount
+        self.error = error
+        self.statements = []
+        self.committed = False
+
+    def __call__(self):
+        return self
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        return False
+
+    async def execute(self, stmt):
+        self.statements.append(stmt)
+        if self.error is not None:
+            raise self.error
+        return SimpleNamespace(rowcount=self.rowcount)
+
+    async def commit(self):
+        self.committed = True
+
+
+class FakeTask:
+    """Stands in for store_event_task: records .delay() calls."""
+
+    def __init__(self, error=None):
+        self.error = error
+        self.calls = []
+
+    def delay(self, *args):
+        if self.error is not None:
+            raise self.error
+        self.calls.append(args)
+
+
+@pytest.fixture
+def queue(monkeypatch):
+    # A fresh queue per test: asyncio queues bind to the loop that first uses them
+    q = asyncio.Queue(maxsize=3)
+    monkeypatch.setattr(event_buffer, "_event_queue", q)
+    monkeypatch.setattr(event_buffer, "EVENT_QUEUE_MAXSIZE", 3)
+    return q
+
+
+@pytest.fixture
+def written(monkeypatch):
+    """Replaces _write_batch with a recorder of the batches the flusher writes."""
+    batches = []
+
+    async def record(batch):
+        batches.append(list(batch))
+
+    monkeypatch.setattr(event_buffer, "_write_batch", record)
+    return batches
+
+
+def test_insert_batch_stmt_joins_extensions_and_keeps_arrival_order():
+    batch = [_row(0), _row(1, account_id="acct-2"), _row(2)]
+    compiled = event_buffer._insert_batch_stmt(batch).compile(
+        dialect=postgresql.dialect())
+    sql = " ".join(str(compiled).split())
+
+    assert sql.startswith(
+        "INSERT INTO events (shop_id, account_id, event_name, payload, received_at) "
+        "SELECT extensions.shop_id, batch.account_id")
+    assert "JOIN extensions ON extensions.account_id = batch.account_id" in sql
+    assert sql.endswith("ORDER BY batch.seq")
+    # Each row is bound with its queue position as seq
+    assert list(compiled.params.values()) == [
+        value
+        for seq, r in enumerate(batch)
+        for value in (seq, r["account_id"], r["event_name"], r["payload"], r["received_at"])
+    ]
+
+
+def test_enqueue_event_stamps_arrival_time(queue):
+    row = {"shop_id": 1, "account_id": "acct-1", "event_name": "page_viewed", "payload": {}}
+
+    event_buffer.enqueue_event(row)
+
+    assert queue.get_nowait() is row
+    assert row["received_at"].tzinfo is timezone.utc
+
+
+def test_enqueue_event_raises_when_buffer_is_full(queue):
+    for n in range(3):
+        event_buffer.enqueue_event(_row(n))
+
+    with pytest.raises(event_buffer.EventQueueFull):
+        event_buffer.enqueue_event(_row(3))
+    assert queue.qsize() == 3
+
+
+def test_write_batch_inserts_and_commits_once(monkeypatch):
+    session = FakeSession(rowcount=2)
+    monkeypatch.setattr(event_buffer, "AsyncSessionLocal", session)
+    task = FakeTask()
+    monkeypatch.setattr(event_buffer, "store_event_task", task)
+
+    asyncio.run(event_buffer._write_batch([_row(0), _row(1)]))
+
+    assert len(session.statements) == 1
+    assert session.committed
+    assert task.calls == []
+
+
+def test_write_batch_offloads_a_failed_batch_to_celery(monkeypatch):
+    session = FakeSession(error=RuntimeError("connection reset"))
+    monkeypatch.setattr(event_buffer, "AsyncSessionLocal", session)
+    task = FakeTask()
+    monkeypatch.setattr(event_buffer, "store_event_task", task)
+    batch = [_row(0), _row(1)]
+
+    asyncio.run(event_buffer._write_batch(batch))
+
+    assert not session.committed
+    assert task.calls == [
+        (1, "acct-1", r["event_name"], r["payload"], r["received_at"].isoformat())
+        for r in batch
+    ]
+
+
+def test_write_batch_logs_lost_events_when_celery_fails_too(monkeypatch, caplog):
+    monkeypatch.setattr(event_buffer, "AsyncSessionLocal",
+                        FakeSession(error=RuntimeError("connection reset")))
+    monkeypatch.setattr(event_buffer, "store_event_task",
+                        FakeTask(error=ConnectionError("broker down")))
+
+    with caplog.at_level(logging.CRITICAL, logger=event_buffer.__name__):
+        asyncio.run(event_buffer._write_batch([_row(0), _row(1)]))
+
+    assert "Lost 2 events" in caplog.text
+
+
+def test_flusher_writes_once_the_flush_interval_elapses(monkeypatch, queue, written):
+    monkeypatch.setattr(event_buffer, "EVENT_FLUSH_INTERVAL_SECONDS", 0.01)
+
+    async def scenario():
+        task = event_buffer.start_event_flusher()
+        event_buffer.enqueue_event(_row(0))
+        event_buffer.enqueue_event(_row(1))
+        await asyncio.sleep(0.2)
+        flushed = list(written)
+        await event_buffer.stop_event_flusher(task)
+        return flushed
+
+    flushed = asyncio.run(scenario())
+
+    assert [[r["event_name"] for r in batch] for batch in flushed] == [["event-0", "event-1"]]
+
+
+def test_flusher_caps_batches_at_batch_size(monkeypatch, queue, written):
+    monkeypatch.setattr(event_buffer, "EVENT_BATCH_SIZE", 2)
+
+    async def scenario():
+        for n in range(3):
+            event_buffer.enqueue_event(_row(n))
+        task = event_buffer.start_event_flusher()
+        await asyncio.sleep(0.2)
+        await event_buffer.stop_event_flusher(task)
+
+    asyncio.run(scenario())
+
+    assert [[r["event_name"] for r in batch] for batch in written] == [
+        ["event-0", "event-1"], ["event-2"]]
+
+
+def test_stopping_the_flusher_writes_out_buffered_events(monkeypatch, queue, written):
+    # Long enough that nothing is flushed before the flusher is stopped
+    monkeypatch.setattr(event_buffer, "EVENT_FLUSH_INTERVAL_SECONDS", 60)
+
+    async def scenario():
+        task = event_buffer.start_event_flusher()
+        event_buffer.enqueue_event(_row(0))
+        await asyncio.sleep(0.01)  # the flusher takes event-0 into its batch
+        event_buffer.enqueue_event(_row(1))
+        event_buffer.enqueue_event(_row(2))
+        await event_buffer.stop_event_flusher(task)
+        return task
+
+    task = asyncio.run(scenario())
+
+    assert task.cancelled()
+    assert [[r["event_name"] for r in batch] for batch in written] == [
+        ["event-0", "event-1", "event-2"]]
+    assert queue.empty()
+
+
+def test_stop_event_flusher_accepts_none():
+    asyncio.run(event_buffer.stop_event_flusher(None))
@@ -0,0 +1,151 @@
+"""
+ingest_event (app/services/event_ingest.py), the pipeline behind both
+POST /api/data/shopify/event and POST /ingest/event, with the id lookup,
+event buffer and Celery task faked out.
+"""
+import asyncio
+import contextlib
+
+import orjson
+import pytest
+
+from app.services import event_ingest
+from app.services.event_buffer import EventQueueFull
+
+EVENT = {
+    "shop": {"name": "ingest-test.myshopify.com"},
+    "event_name": "page_viewed",
+    "payload": {"customer": None},
+    "account_id": "acct-1",
+}
+
+
+class FakeTask:
+    """Stands in for store_event_task: records .delay() calls."""
+
+    def __init__(self, error=None):
+        self.error = error
+        self.calls = []
+
+    def delay(self, *args):
+        if self.error is not None:
+            raise self.error
+        self.calls.append(args)
+
+
+@pytest.fixture
+def ids(monkeypatch):
+    """(shop_id, extension_shop_id) that resolve_event_ids answers with."""
+    resolved = {"ids": (1, 7)}
+
+    async def resolve_event_ids(shop_domain, account_id, db):
+        return resolved["ids"]
+
+    # No session is opened: resolve_event_ids is the only thing that uses it
+    monkeypatch.setattr(event_ingest, "AsyncSessionLocal", contextlib.nullcontext)
+    monkeypatch.setattr(event_ingest, "resolve_event_ids", resolve_event_ids)
+    return resolved
+
+
+@pytest.fixture
+def enqueued(monkeypatch):
+    rows = []
+    monkeypatch.setattr(event_ingest, "enqueue_event", rows.append)
+    return rows
+
+
+@pytest.fixture
+def task(monkeypatch):
+    fake = FakeTask()
+    monkeypatch.setattr(event_ingest, "store_event_task", fake)
+    return fake
+
+
+def _ingest(event, **kwargs):
+    status_code, body = asyncio.run(event_ingest.ingest_event(orjson.dumps(event), **kwargs))
+    return status_code, orjson.loads(body)
+
+
+def _queue_full(row):
+    raise EventQueueFull("Event buffer is full (10000 pending events)")
+
+
+def test_accepted_event_is_buffered_under_the_extensions_shop(ids, enqueued, task):
+    status_code, body = _ingest(EVENT)
+
+    assert status_code == 202
+    assert body == {"success": True, "message": "Event accepted"}
+    assert enqueued == [{
+        "shop_id": 7,
+        "account_id": "acct-1",
+        "event_name": "page_viewed",
+        "payload": {"customer": None},
+    }]
+    assert task.calls == []
+
+
+def test_accepted_status_is_set_by_the_caller(ids, enqueued, task):
+    status_code, _ = _ingest(EVENT, accepted_status=200)
+
+    assert status_code == 200
+
+
+def test_invalid_body_is_a_fastapi_shaped_422(ids, enqueued, task):
+    status_code, body = _ingest({"event_name": "page_viewed", "payload": {}})
+
+    assert status_code == 422
+    assert sorted(tuple(err["loc"]) for err in body["detail"]) == [
+        ("body", "account_id"), ("body", "shop")]
+    assert all(err["type"] == "missing" for err in body["detail"])
+    assert enqueued == []
+
+
+def test_malformed_json_is_a_422(ids, enqueued, task):
+    status_code, body = asyncio.run(event_ingest.ingest_event(b"{not json"))
+
+    assert status_code == 422
+    assert orjson.loads(body)["detail"][0]["loc"][0] == "body"
+
+
+@pytest.mark.parametrize("resolved, detail", [
+    ((None, 7), "Shop not found"),
+    ((1, None), "Extension not found"),
+])
+def test_unknown_shop_or_extension_is_a_404(ids, enqueued, task, resolved, detail):
+    ids["ids"] = resolved
+
+    status_code, body = _ingest(EVENT)
+
+    assert (status_code, body) == (404, {"detail": detail})
+    assert enqueued == []
+
+
+def test_full_buffer_falls_back_to_celery(monkeypatch, ids, task):
+    monkeypatch.setattr(event_ingest, "enqueue_event", _queue_full)
+
+    status_code, _ = _ingest(EVENT)
+
+    assert status_code == 202
+    assert task.calls == [(7, "acct-1", "page_viewed", {"customer": None})]
+
+
+def test_full_buffer_with_broker_down_is_a_503(monkeypatch, ids):
+    monkeypatch.setattr(event_ingest, "enqueue_event", _queue_full)
+    monkeypatch.setattr(event_ingest, "store_event_task",
+                        FakeTask(error=ConnectionError("broker down")))
+
+    status_code, body = _ingest(EVENT)
+
+    assert (status_code, body) == (503, {"detail": "Event buffer full, try again later"})
+
+
+def test_lookup_failure_is_a_500(monkeypatch, ids, enqueued, task):
+    async def resolve_event_ids(shop_domain, account_id, db):
+        raise ConnectionError("redis down")
+
+    monkeypatch.setattr(event_ingest, "resolve_event_ids", resolve_event_ids)
+
+    status_code, body = _ingest(EVENT)
+
+    assert (status_code, body) == (500, {"detail": "Error processing event"})
+    assert enqueued == []
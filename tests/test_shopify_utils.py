@@ -0,0 +1,33 @@
+import pytest
+
+from app.utils.shopify_utils import is_valid_shop_domain
+
+
+@pytest.mark.parametrize("shop", [
+    "my-store.myshopify.com",
+    "store1.myshopify.com",
+    "0.myshopify.com",
+])
+def test_accepts_myshopify_domains(shop):
+    assert is_valid_shop_domain(shop)
+
+
+@pytest.mark.parametrize("shop", [
+    "",
+    None,
+    "attacker.com",
+    "my-store.myshopify.com.attacker.com",
+    "attacker.com/my-store.myshopify.com",
+    "-store.myshopify.com",
+    "My-Store.myshopify.com",
+    "my_store.myshopify.com",
+    "sub.my-store.myshopify.com",
+    "https://my-store.myshopify.com",
+    "my-store.myshopify.com/admin",
+    # A trailing newline would end up in OAuth URLs and Redis keys
+    "my-store.myshopify.com\n",
+    "\nmy-store.myshopify.com",
+    "my-store.myshopify.com\r\n",
+])
+def test_rejects_anything_else(shop):
+    assert not is_valid_shop_domain(shop)